@@ -165,3 +165,67 @@ def test_multiple_limits():
 def test_copy():
     new_gauss = gauss_params1.copy()
     assert new_gauss == gauss_params1
+
+
+def test_normalization_cache():
+    mu_cache = Parameter("mu_cache", 0.4, -3., 3.)
+    sigma_cache = Parameter("sigma_cache", 1.2, 0.1, 5.)
+    gauss_cached = Gauss(mu=mu_cache, sigma=sigma_cache, obs=obs1, name="gauss_cached")
+    gauss_uncached = Gauss(mu=mu_cache, sigma=sigma_cache, obs=obs1, name="gauss_uncached")
+    gauss_uncached.cache_normalization = False
+
+    limits = Space(obs=obs1, limits=(low, high))
+    norm_cached = gauss_cached.normalization(limits=limits)
+    norm_uncached = gauss_uncached.normalization(limits=limits)
+    grad_cached = tf.gradients(norm_cached, [mu_cache, sigma_cache])
+    grad_uncached = tf.gradients(norm_uncached, [mu_cache, sigma_cache])
+
+    for _ in range(2):  # second time from the cache
+        values_cached = zfit.run([norm_cached, grad_cached])
+        values_uncached = zfit.run([norm_uncached, grad_uncached])
+        assert values_cached[0] == pytest.approx(values_uncached[0], rel=1e-8)
+        assert values_cached[1] == pytest.approx(values_uncached[1], rel=1e-8)
+
+    mu_cache.load(1.1, session=zfit.run.sess)  # has to be recomputed
+    assert zfit.run(norm_cached) == pytest.approx(zfit.run(norm_uncached), rel=1e-8)
+
+
+def test_normalization_cache_sum_fracs():
+    from zfit.util.cache import get_cache_switch
+
+    frac = Parameter("frac_norm_cache", 0.3, 0., 1.)
+    gauss_narrow = Gauss(mu=0.2, sigma=0.5, obs=obs1, name="gauss_narrow")
+    gauss_wide = Gauss(mu=0.2, sigma=3., obs=obs1, name="gauss_wide")
+    sum_pdf = zfit.pdf.SumPDF(pdfs=[gauss_narrow, gauss_wide], fracs=frac)
+    norm = sum_pdf.normalization(limits=Space(obs=obs1, limits=(low, high)))
+
+    norm_values = []
+    for frac_value in (0.3, 0.7):  # the frac is only a Tensor in the sum, the cache has to find it
+        frac.load(frac_value, session=zfit.run.sess)
+        norm_values.append(zfit.run(norm))
+        assert norm_values[-1] == pytest.approx(zfit.run(norm, feed_dict={get_cache_switch(): False}),
+                                                rel=1e-8)
+    assert norm_values[0] != pytest.approx(norm_values[1], rel=1e-3)
+
+
+def test_pdf_graph_cache():
+    from zfit.util.graph import graph_build_profiler
+
+    test_values_tensor = ztf.convert_to_tensor(test_values)
+    gauss = Gauss(mu=mu, sigma=sigma, obs=obs1, name="gauss_graph_cache")
+    with graph_build_profiler:
+        probs = gauss.pdf(test_values_tensor, norm_range=(low, high))
+        assert gauss.pdf(test_values_tensor, norm_range=(low, high)) is probs
+        probs_other_range = gauss.pdf(test_values_tensor, norm_range=(low - 1., high))
+        assert probs_other_range is not probs
+        with tf.control_dependencies([probs]):  # can't reuse the tensors from outside
+            assert gauss.pdf(test_values_tensor, norm_range=(low, high)) is not probs
+    assert graph_build_profiler.stats["gauss_graph_cache"]['n_builds'] == 3
+    assert graph_build_profiler.stats["gauss_graph_cache"]['n_cached'] == 1
+    probs_np, probs_other_range_np = zfit.run([probs, probs_other_range])
+    assert probs_np == pytest.approx(probs_other_range_np * (probs_np[0] / probs_other_range_np[0]), rel=1e-8)
+
+    for _ in range(gauss._DEFAULT_pdf_cache_size + 1):  # the oldest graphs are released
+        gauss.pdf(ztf.convert_to_tensor(test_values), norm_range=(low, high))
+    assert len(gauss._pdf_cache) == gauss._DEFAULT_pdf_cache_size
+    assert gauss.pdf(test_values_tensor, norm_range=(low, high)) is not probs
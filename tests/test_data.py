@@ -60,6 +60,115 @@ def test_from_root():
     x = data.value()
 
 
+def test_from_root_cut():
+    try:
+        from skhep_testdata import data_path
+    except ImportError:
+        return  # TODO: install skhep_testdata for tests
+    import uproot
+
+    path_root = data_path("uproot-Zmumu.root")
+    branches = ['pt1', 'pt2']
+    arrays = uproot.open(path_root)['events'].arrays(branches + ['eta1'], namedecode='utf-8')
+    in_cut = (arrays['pt1'] > 30) & (np.abs(arrays['eta1']) < 1.5)
+
+    data = zfit.data.Data.from_root(path=path_root, treepath='events', branches=branches,
+                                    cut="(pt1 > 30) & (np.abs(eta1) < 1.5)", entrysteps=500)
+    x = zfit.run(data.value())
+    np.testing.assert_allclose(x, np.array([arrays[branch][in_cut] for branch in branches]))
+
+
+def test_from_root_cache(tmpdir):
+    try:
+        from skhep_testdata import data_path
+    except ImportError:
+        return  # TODO: install skhep_testdata for tests
+
+    path_root = data_path("uproot-Zmumu.root")
+    branches = ['pt1', 'pt2']
+    cache_dir = str(tmpdir.join('cache'))
+    data = zfit.data.Data.from_root(path=path_root, treepath='events', branches=branches, cache_dir=cache_dir)
+    cache_files = tmpdir.join('cache').listdir()
+    assert len(cache_files) == 1
+    data_cached = zfit.data.Data.from_root(path=path_root, treepath='events', branches=branches,
+                                           cache_dir=cache_dir)
+    assert tmpdir.join('cache').listdir() == cache_files
+    np.testing.assert_array_equal(zfit.run(data_cached.value()), zfit.run(data.value()))
+
+
+def test_from_root_cache_list(tmpdir):
+    try:
+        from skhep_testdata import data_path
+    except ImportError:
+        return  # TODO: install skhep_testdata for tests
+
+    path_root = data_path("uproot-Zmumu.root")
+    branches = ['pt1', 'pt2']
+    cache_dir = tmpdir.join('cache')
+    data = zfit.data.Data.from_root(path=path_root, treepath='events', branches=branches)
+    data_list = zfit.data.Data.from_root(path=[path_root, path_root], treepath='events', branches=branches,
+                                         cache_dir=str(cache_dir))
+    assert not cache_dir.check()  # a list of files is not cached
+    x = zfit.run(data.value())
+    np.testing.assert_array_equal(zfit.run(data_list.value()), np.concatenate([x, x], axis=1))
+
+
+def test_root_cache_path(tmpdir):
+    from zfit.core.data import _root_cache_path
+
+    path = tmpdir.join('file.root')
+    path.write('content')
+    cache_path = _root_cache_path(cache_dir=str(tmpdir), path=str(path), treepath='events', branches=['x'],
+                                  cut=None)
+    assert cache_path == _root_cache_path(cache_dir=str(tmpdir), path=str(path), treepath='events',
+                                          branches=['x'], cut=None)
+    assert cache_path != _root_cache_path(cache_dir=str(tmpdir), path=str(path), treepath='events',
+                                          branches=['x'], cut='x > 1')
+    path.write('modified content')
+    assert cache_path != _root_cache_path(cache_dir=str(tmpdir), path=str(path), treepath='events',
+                                          branches=['x'], cut=None)
+
+
+def test_prefetch():
+    from zfit.core.data import _prefetch
+
+    assert list(_prefetch(iter(range(20)), n_prefetch=3)) == list(range(20))
+
+    def failing_generator():
+        yield 1
+        raise IOError("cannot read")
+
+    with pytest.raises(IOError):
+        list(_prefetch(failing_generator(), n_prefetch=2))
+
+
+def test_prefetch_abandoned():
+    import threading
+    import time
+    from zfit.core.data import _prefetch
+
+    closed = threading.Event()
+
+    def endless_generator():
+        try:
+            while True:
+                yield 1
+        finally:
+            closed.set()
+
+    n_threads = threading.active_count()
+    chunks = _prefetch(endless_generator(), n_prefetch=2)
+    assert next(chunks) == 1
+    time.sleep(0.2)  # the producer is now blocked on the full queue
+    chunks.close()
+    assert closed.wait(timeout=5)
+    for _ in range(50):
+        if threading.active_count() == n_threads:
+            break
+        time.sleep(0.1)
+    assert threading.active_count() == n_threads
+
+
 def test_from_numpy():
     example_data = np.random.random(size=(len(obs1), 1000))
     data = zfit.data.Data.from_numpy(obs=obs1, array=example_data)
@@ -69,6 +178,63 @@ def test_from_numpy():
     np.testing.assert_array_equal(example_data, x_np)
 
 
+def test_weights():
+    example_data = np.random.random(size=(len(obs1), 1000))
+    example_weights = np.random.random(size=1000)
+    data = zfit.data.Data.from_numpy(obs=obs1, array=example_data, weights=example_weights)
+    assert zfit.data.Data.from_numpy(obs=obs1, array=example_data).weights is None
+    np.testing.assert_allclose(zfit.run(data.weights), example_weights)
+
+    squared_weights_data = data.with_weights(data.weights ** 2)
+    x_np, weights_np = zfit.run([squared_weights_data.value(), squared_weights_data.weights])
+    np.testing.assert_array_equal(example_data, x_np)
+    np.testing.assert_allclose(weights_np, example_weights ** 2)
+
+
+def test_filter_range():
+    example_data = np.random.random(size=(len(obs1), 1000))
+    example_weights = np.random.random(size=1000)
+    data = zfit.data.Data.from_numpy(obs=obs1, array=example_data, weights=example_weights)
+    limits = zfit.Space(obs='obs2', limits=(((0.1,), (0.6,)), ((0.3,), (0.8,))))  # two ranges
+    data_in_range = data.filter_range(limits)
+    assert data.filter_range(limits) is data_in_range  # the view is created only once
+    assert data_in_range.filter_range(limits) is data_in_range
+
+    in_range = np.logical_or(np.logical_and(0.1 <= example_data[1], example_data[1] <= 0.3),
+                             np.logical_and(0.6 <= example_data[1], example_data[1] <= 0.8))
+    x_np, weights_np = zfit.run([data_in_range.value(), data_in_range.weights])
+    np.testing.assert_array_equal(x_np, example_data[:, in_range])
+    np.testing.assert_allclose(weights_np, example_weights[in_range])
+
+
+@pytest.mark.parametrize('as_directory', [False, True])
+def test_from_npy(tmpdir, as_directory):
+    example_data = np.random.random(size=(len(obs1), 1000))
+    example_weights = np.random.random(size=1000)
+    columns = list(obs1) + ['weights']
+    if as_directory:
+        for column, values in zip(columns, list(example_data) + [example_weights]):
+            np.save(str(tmpdir.join(column + '.npy')), values)
+        path = str(tmpdir)
+    else:
+        array = np.zeros(1000, dtype=[(column, np.float64) for column in columns])
+        for column, values in zip(columns, list(example_data) + [example_weights]):
+            array[column] = values
+        path = str(tmpdir.join('data.npy'))
+        np.save(path, array)
+
+    data = zfit.data.Data.from_npy(path=path, obs=['obs3', 'obs1'], weights='weights')
+    x_np, weights_np = zfit.run([data.value(), data.weights])
+    np.testing.assert_array_equal(x_np, example_data[[2, 0]])
+    np.testing.assert_allclose(weights_np, example_weights)
+
+    x_chunk, weights_chunk = data.chunk(900, 1200, obs=['obs1', 'obs3'])  # only the last 100 rows exist
+    x_chunk_np, weights_chunk_np = zfit.run([x_chunk, weights_chunk])
+    np.testing.assert_array_equal(x_chunk_np, example_data[[0, 2], 900:])
+    np.testing.assert_allclose(weights_chunk_np, example_weights[900:])
+    assert zfit.run(data.n_chunks(300)) == 4
+
+
 def test_from_tensors():
     pass
     # data.initialize(sess=zfit.sess)
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+import zfit
+from zfit.minimizers.minimizer_minuit import MinuitMinimizer
+
+mu_true = 1.2
+sigma_true = 4.1
+limits = (-15., 18.)
+
+
+def create_gauss_loss():
+    mu = zfit.Parameter("mu_errors", mu_true, mu_true - 2., mu_true + 2.)
+    sigma = zfit.Parameter("sigma_errors", sigma_true, sigma_true - 2., sigma_true + 2.)
+    obs = zfit.Space(obs='obs1', limits=limits)
+    gauss = zfit.pdf.Gauss(mu=mu, sigma=sigma, obs=obs)
+    values = np.random.RandomState(42).normal(loc=mu_true, scale=sigma_true, size=(1, 1000))
+    data = zfit.data.Data.from_numpy(obs=obs, array=values)
+    return zfit.loss.UnbinnedNLL(model=gauss, data=data, fit_range=limits)
+
+
+def test_parallel_minos():
+    loss = create_gauss_loss()
+    params = sorted(loss.get_dependents(only_floating=True), key=lambda param: param.name)
+    result = MinuitMinimizer().minimize(loss=loss, params=params)
+    errors = result.error(params=params, method='minuit_minos')
+    errors_parallel = result.error(params=params, method='minuit_minos', error_name='minos_parallel',
+                                   n_workers=2, create_loss=create_gauss_loss)
+    assert list(errors_parallel) == params
+    for param in params:
+        assert errors_parallel[param]['lower'] == pytest.approx(errors[param]['lower'], rel=0.01)
+        assert errors_parallel[param]['upper'] == pytest.approx(errors[param]['upper'], rel=0.01)
+        assert result.params[param]['minos_parallel'] is errors_parallel[param]
+
+
+def test_profile_errors():
+    loss = create_gauss_loss()
+    params = sorted(loss.get_dependents(only_floating=True), key=lambda param: param.name)
+    result = MinuitMinimizer().minimize(loss=loss, params=params)
+    values = [result.params[param]['value'] for param in params]
+    errors_minos = result.error(params=params, method='minuit_minos')
+    errors = result.error(params=params, method='profile_errors')
+    for param, value in zip(params, values):
+        assert errors[param]['is_valid']
+        assert errors[param]['lower'] < 0 < errors[param]['upper']
+        assert errors[param]['lower'] == pytest.approx(errors_minos[param]['lower'], rel=0.02)
+        assert errors[param]['upper'] == pytest.approx(errors_minos[param]['upper'], rel=0.02)
+        assert zfit.run(param) == pytest.approx(value)
+
+
+def test_profile_errors_scipy():
+    import tensorflow as tf
+
+    loss = create_gauss_loss()
+    params = sorted(loss.get_dependents(only_floating=True), key=lambda param: param.name)
+    result_minuit = MinuitMinimizer().minimize(loss=loss, params=params)
+    errors_minos = result_minuit.error(params=params, method='minuit_minos')
+
+    minimizer = zfit.minimize.ScipyMinimizer()
+    result = minimizer.minimize(loss=loss, params=params)
+    errors = result.error(params=params[:1], method='profile_errors')
+    n_ops = len(tf.get_default_graph().get_operations())
+    errors.update(result.error(params=params[1:], method='profile_errors'))
+    n_ops_per_param = len(tf.get_default_graph().get_operations()) - n_ops
+    errors.update(result.error(params=params, method='profile_errors', error_name='profile_errors2'))
+    # the graph grows per call and parameter, not per profiled point
+    assert len(tf.get_default_graph().get_operations()) - n_ops <= 4 * n_ops_per_param
+    for param in params:
+        assert errors[param]['is_valid']
+        assert errors[param]['lower'] == pytest.approx(errors_minos[param]['lower'], rel=0.02)
+        assert errors[param]['upper'] == pytest.approx(errors_minos[param]['upper'], rel=0.02)
@@ -1,4 +1,5 @@
 import copy
+import os
 
 import pytest
 
@@ -14,7 +15,8 @@ def test_run():
 
 @pytest.mark.parametrize(["n_cpu", 'taken', 'left'], [[3, 5, 0], [0, -1, 0], [10, 3, 7],
                                                       [5, -1, 0], [8, -3, 2], [5, 0, 5]])
-def test_cpu_management(n_cpu, taken, left):
+def test_cpu_management(n_cpu, taken, left, monkeypatch):
+    monkeypatch.setattr(os, 'sched_getaffinity', lambda pid: set(range(16)), raising=False)
     zfit.run.set_n_cpu(n_cpu=n_cpu)
     _cpu = copy.deepcopy(zfit.run._cpu)
     assert zfit.run.n_cpu == n_cpu
@@ -24,3 +26,56 @@ def test_cpu_management(n_cpu, taken, left):
         assert len(cpus) == n_cpu - left
     assert zfit.run.n_cpu == n_cpu
     assert _cpu == zfit.run._cpu
+
+
+def test_set_n_cpu_available(monkeypatch):
+    monkeypatch.setattr(os, 'sched_getaffinity', lambda pid: {2, 5}, raising=False)
+    try:
+        with pytest.warns(UserWarning):
+            zfit.run.set_n_cpu(n_cpu=4)
+        assert zfit.run._cpu == [2, 5]  # only the CPUs the process may run on
+        zfit.run.set_n_cpu(n_cpu=1)
+        assert zfit.run._cpu == [2]
+        with pytest.warns(UserWarning):
+            zfit.run.set_n_cpu(n_cpu=[1, 5])
+        assert zfit.run._cpu == [5]
+        with pytest.warns(UserWarning):
+            zfit.run.set_n_cpu(n_cpu=[0, 1])
+        assert zfit.run._cpu == [2, 5]
+        zfit.run.set_n_cpu(n_cpu=[5])
+        assert zfit.run._cpu == [5]
+    finally:
+        monkeypatch.undo()
+        zfit.run.set_n_cpu()
+
+
+def test_session_config(monkeypatch):
+    monkeypatch.setattr(os, 'sched_getaffinity', lambda pid: set(range(16)), raising=False)
+    zfit.run.set_n_cpu(n_cpu=3)
+    config = zfit.run.config
+    assert config.intra_op_parallelism_threads == 3
+    assert config.inter_op_parallelism_threads == 3
+    assert [pool.num_threads for pool in config.session_inter_op_thread_pool] == [3, 1, 1, 1]
+
+    zfit.run.create_session()
+    try:
+        with zfit.run.aquire_cpu(max_cpu=1) as cpu1, zfit.run.aquire_cpu(max_cpu=2) as cpu2:
+            pool1 = zfit.run.get_run_options(cpu=cpu1).inter_op_thread_pool
+            pool2 = zfit.run.get_run_options(cpu=cpu2).inter_op_thread_pool
+        assert pool1 != pool2
+        assert {pool1, pool2} <= {1, 2, 3}
+        assert zfit.run.get_run_options(cpu=[]).inter_op_thread_pool == 0
+        a = ztf.constant(4.)
+        assert zfit.run(5 * a, options=zfit.run.get_run_options(cpu=cpu1)) == pytest.approx(20)
+    finally:
+        monkeypatch.undo()
+        zfit.run.set_n_cpu()
+        zfit.run.create_session()
+
+
+def test_split_cpu():
+    from zfit.util.execution import split_cpu
+
+    assert split_cpu([0, 1, 2, 3, 4], n_blocks=2) == [[0, 1, 2], [3, 4]]
+    assert split_cpu([3, 5], n_blocks=4) == [[3], [5]]  # every block gets a CPU of its own
+    assert split_cpu([], n_blocks=2) == []
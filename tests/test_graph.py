@@ -1,5 +1,7 @@
 import sys
 
+import tensorflow as tf
+
 import zfit
 from zfit import ztf
 from zfit.util.graph import get_dependents
@@ -21,3 +23,32 @@ def test_get_dependents():
     assert get_dependents(e, [a, b, c, d, var1, var2, var3]) == [a, b, d, var1, var2]
     assert get_dependents(e, [var1, var2, var3]) == [var1, var2]
     assert get_dependents(c, [a, b, d, var1, var2, var3]) == [b, var1, var3]
+
+
+def test_get_dependents_deep():
+    var1 = zfit.Parameter('var1_deep', 1.)
+    var2 = zfit.Parameter('var2_deep', 2.)
+    x = var1 * 1.
+    for _ in range(3 * sys.getrecursionlimit()):  # deeper than the recursion limit
+        x = x + 1.
+    assert get_dependents(x, [var1, var2]) == [var1]
+    assert get_dependents(x * var2, [var1, var2]) == [var1, var2]  # reuses the ancestry of `x`
+
+
+def test_get_dependents_loop():
+    var1 = zfit.Parameter('var1_loop', 1.)
+    var2 = zfit.Parameter('var2_loop', 2.)
+    var3 = zfit.Parameter('var3_loop', 3.)
+    inside = []
+
+    def body(i, total):
+        value = total + var2 * ztf.to_real(i)
+        inside.append(value)
+        return i + 1, value
+
+    _, total = tf.while_loop(cond=lambda i, _: i < 3, body=body, loop_vars=[0, var1 * 1.])
+    assert get_dependents(total, [var1, var2, var3]) == [var1, var2]
+    assert get_dependents(inside[0], [var1, var2, var3]) == [var1, var2]  # through the loop back to `var1`
+    # siblings share the memoized ancestry of `total`
+    assert get_dependents(total * var3, [var1, var2, var3]) == [var1, var2, var3]
+    assert get_dependents(total + 1., [var1, var2, var3]) == [var1, var2]
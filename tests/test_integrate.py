@@ -251,6 +251,37 @@ def test_mc_partial_integration():
                                     limits=limits4_1dim) == pytest.approx(integral2, rel=0.03)
 
 
+def test_mc_integration_chunked():
+    param = Parameter("param_chunked_mc", 2.)
+
+    def func2_1deps_param(x):
+        return param * func2_1deps(x)
+
+    zfit.run.chunking.active = True
+    zfit.run.chunking.max_n_points = 1000
+    try:
+        num_integral = zintegrate.mc_integrate(func=func2_1deps_param,
+                                               limits=Space.from_axes(limits=limits2, axes=(0,)),
+                                               n_axes=1, draws_per_dim=10000)
+        num_gradient = tf.gradients(num_integral, param)
+        num_partial_integral = zintegrate.mc_integrate(x=ztf.convert_to_tensor(func4_values),
+                                                       func=func4_3deps,
+                                                       limits=Space.from_axes(limits=limits4_2dim,
+                                                                              axes=(0, 2)),
+                                                       draws_per_dim=70)
+    finally:
+        zfit.run.chunking.active = False
+        zfit.run.chunking.max_n_points = 100000
+
+    integral, gradient, partial_integral = zfit.run([num_integral, num_gradient, num_partial_integral])
+    true_integral = func2_1deps_fully_integrated(limits2)
+    assert integral == pytest.approx(2 * true_integral, rel=0.03)
+    assert gradient[0] == pytest.approx(true_integral, rel=0.03)
+    assert len(partial_integral) == len(func4_values)
+    assert func4_3deps_0and2_integrated(x=func4_values,
+                                        limits=limits4_2dim) == pytest.approx(partial_integral, rel=0.03)
+
+
 def test_analytic_integral():
     class DistFunc3(zbasepdf.BasePDF):
         def _unnormalized_pdf(self, x, norm_range=False):
@@ -323,3 +354,23 @@ def test_analytic_integral_selection():
     dims = DistFuncInts._analytic_integral.get_max_axes(limits=Space.from_axes(limits=(((-5, 1),), ((1, 5),)),
                                                                                axes=dims3))
     assert dims3 == dims
+
+
+def test_analytic_integral_lookup_cache():
+    class DistFuncCached(zbasepdf.BasePDF):
+        def _unnormalized_pdf(self, x, norm_range=False):
+            return x ** 2
+
+    int1 = lambda x: 1
+    int12 = lambda x: 12
+    limits = Space.from_axes(axes=(0,), limits=(-2, 3))
+    DistFuncCached.register_analytic_integral(int1, limits=Space.from_axes(axes=(0,), limits=(-5, 5)))
+    analytic_integral = DistFuncCached._analytic_integral
+    assert analytic_integral.get_max_axes(limits=limits) == (0,)
+    assert analytic_integral.get_max_axes(limits=limits) == (0,)  # memoized
+    assert analytic_integral.get_max_axes(limits=Space.from_axes(axes=(0,), limits=(-7, 3))) == ()
+
+    # registering invalidates the memoized lookups
+    DistFuncCached.register_analytic_integral(int12, limits=Space.from_axes(axes=(0,), limits=(-10, 10)))
+    assert analytic_integral.get_max_axes(limits=Space.from_axes(axes=(0,), limits=(-7, 3))) == (0,)
+    assert analytic_integral.get_max_integral(limits=limits, axes=(0,)) is not None
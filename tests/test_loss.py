@@ -74,6 +74,321 @@ def test_unbinned_simultaneous_nll():
     assert params[sigma2]['value'] == pytest.approx(np.std(test_values_np2), rel=0.005)
 
 
+def test_unbinned_simultaneous_nll_parallel():
+    from zfit.minimizers.evaluator import LossEval
+
+    test_values = tf.constant(test_values_np)
+    test_values2 = tf.constant(test_values_np2)
+    nll_object = zfit.loss.UnbinnedNLL(model=[gaussian1, gaussian2],
+                                       data=[test_values, test_values2],
+                                       fit_range=[(low, high), (low, high)])
+    params = [mu1, sigma1, mu2, sigma2]
+    values = zfit.run(params)
+    value, gradient = LossEval(loss=nll_object, params=params).value_gradient(values)
+
+    zfit.run.parallel.components = True
+    try:
+        loss_eval_parallel = LossEval(loss=nll_object, params=params)
+    finally:
+        zfit.run.parallel.components = False
+    assert len(loss_eval_parallel._components_tensors) == 2
+    value_parallel, gradient_parallel = loss_eval_parallel.value_gradient(values)
+    assert value_parallel == pytest.approx(value, rel=1e-8)
+    assert list(gradient_parallel) == pytest.approx(list(gradient), rel=1e-8)
+    executor = loss_eval_parallel._executor
+    assert loss_eval_parallel.value([v * 1.01 for v in values]) != pytest.approx(value)
+    assert loss_eval_parallel._executor is executor  # the pool is created once
+
+
+def test_unbinned_simultaneous_nll_cache_components():
+    test_values = tf.constant(test_values_np)
+    test_values2 = tf.constant(test_values_np2)
+    nll_object = zfit.loss.UnbinnedNLL(model=[gaussian1, gaussian2],
+                                       data=[test_values, test_values2],
+                                       fit_range=[(low, high), (low, high)])
+    nll_cached = zfit.loss.UnbinnedNLL(model=[gaussian1, gaussian2],
+                                       data=[test_values, test_values2],
+                                       fit_range=[(low, high), (low, high)])
+    nll_cached.cache_components = True
+    params = [mu1, sigma1, mu2, sigma2]
+    nll, nll_cached_value = nll_object.value(), nll_cached.value()
+    gradients, gradients_cached = tf.gradients(nll, params), tf.gradients(nll_cached_value, params)
+
+    for mu1_value in (mu_true, mu_true + 0.1, mu_true + 0.1, mu_true - 0.3):  # only one term changes
+        mu1.load(mu1_value, session=zfit.run.sess)
+        nll_np, nll_cached_np, gradients_np, gradients_cached_np = zfit.run([nll, nll_cached_value, gradients,
+                                                                             gradients_cached])
+        assert nll_cached_np == pytest.approx(nll_np, rel=1e-10)
+        assert gradients_cached_np == pytest.approx(gradients_np, rel=1e-8)
+
+    minimizer = MinuitMinimizer()
+    result = minimizer.minimize(loss=nll_cached, params=params)
+    assert result.params[mu1]['value'] == pytest.approx(np.mean(test_values_np), rel=0.01)
+    assert result.params[mu2]['value'] == pytest.approx(np.mean(test_values_np2), rel=0.01)
+
+
+def test_cache_components_sum_fracs():
+    frac = Parameter("frac_cache_components", 0.4, 0., 1.)
+    sum_pdf = zfit.pdf.SumPDF(pdfs=[gaussian1, gaussian2], fracs=frac)
+    assert frac in sum_pdf.get_dependents()
+    test_values = tf.constant(test_values_np)
+    nll_object = zfit.loss.UnbinnedNLL(model=[sum_pdf, gaussian3], data=[test_values, test_values],
+                                       fit_range=[(low, high), (low, high)])
+    nll_cached = zfit.loss.UnbinnedNLL(model=[sum_pdf, gaussian3], data=[test_values, test_values],
+                                       fit_range=[(low, high), (low, high)])
+    nll_cached.cache_components = True
+    nll, nll_cached_value = nll_object.value(), nll_cached.value()
+    gradient, gradient_cached = tf.gradients(nll, frac)[0], tf.gradients(nll_cached_value, frac)[0]
+
+    for frac_value in (0.4, 0.4, 0.6):  # the second evaluation is cached, the third has to recompute
+        frac.load(frac_value, session=zfit.run.sess)
+        nll_np, nll_cached_np, gradient_np, gradient_cached_np = zfit.run([nll, nll_cached_value, gradient,
+                                                                           gradient_cached])
+        assert nll_cached_np == pytest.approx(nll_np, rel=1e-10)
+        assert gradient_np != 0.
+        assert gradient_cached_np == pytest.approx(gradient_np, rel=1e-8)
+
+
+def test_value_batch():
+    from zfit.minimizers.evaluator import LossEval
+
+    test_values = ztf.constant(test_values_np)
+    nll_object = UnbinnedNLL(model=gaussian1, data=test_values, fit_range=(low, high))
+    params = [mu1, sigma1]
+    old_values = zfit.run(params)
+    points = np.array([[mu_true, sigma_true], [mu_true - 0.5, sigma_true], [mu_true + 0.3, sigma_true - 1.]])
+
+    values, gradients = nll_object.value_batch(params=params, values=points, gradient=True)
+    assert values.shape == (3,)
+    assert gradients.shape == (3, 2)
+    assert zfit.run(params) == pytest.approx(old_values)  # restored
+    assert list(nll_object.value_batch(params=params, values=points)) == pytest.approx(list(values), rel=1e-8)
+
+    loss_eval = LossEval(loss=nll_object, params=params)
+    for point, value, gradient in zip(points, values, gradients):
+        true_value, true_gradient = loss_eval.value_gradient(point)
+        assert value == pytest.approx(true_value, rel=1e-8)
+        assert list(gradient) == pytest.approx(list(true_gradient), rel=1e-6)
+
+
+def test_profile():
+    test_values = ztf.constant(test_values_np)
+    nll_object = UnbinnedNLL(model=gaussian1, data=test_values, fit_range=(low, high))
+    minimizer = MinuitMinimizer()
+    result = minimizer.minimize(loss=nll_object, params=[mu1, sigma1])
+    mu_min = result.params[mu1]['value']
+    sigma_min = result.params[sigma1]['value']
+
+    mu_grid = np.linspace(mu_min - 0.2, mu_min + 0.2, 5)
+    profile = result.profile(params=mu1, grid=mu_grid)
+    assert list(profile) == [mu1.name, 'fmin', 'delta_fmin', 'converged']
+    assert list(profile[mu1.name]) == pytest.approx(list(mu_grid))
+    assert np.all(profile['converged'])
+    assert profile['delta_fmin'][2] == pytest.approx(0., abs=1e-3)
+    assert np.all(profile['delta_fmin'] >= -1e-3)
+    assert profile['delta_fmin'][0] == pytest.approx(profile['delta_fmin'][4], rel=0.1)  # parabola
+    assert zfit.run([mu1, sigma1]) == pytest.approx([mu_min, sigma_min])
+
+    sigma_grid = np.linspace(sigma_min - 0.2, sigma_min + 0.2, 3)
+    profile_2d = result.profile(params=[mu1, sigma1], grid=[mu_grid, sigma_grid])
+    assert len(profile_2d['fmin']) == 15
+    assert profile_2d['delta_fmin'][7] == pytest.approx(0., abs=1e-3)  # the minimum is in the middle
+    assert np.argmin(profile_2d['fmin']) == 7
+
+
+@pytest.mark.parametrize('n_bins', [100, 37])
+def test_binned_nll(n_bins):
+    test_values = ztf.constant(test_values_np)
+    nll_object = zfit.loss.BinnedNLL(model=gaussian1, data=test_values, fit_range=(low, high), n_bins=n_bins)
+    minimizer = MinuitMinimizer()
+    status = minimizer.minimize(loss=nll_object, params=[mu1, sigma1])
+    params = status.params
+    bin_width = (high - low) / n_bins
+    assert params[mu1]['value'] == pytest.approx(np.mean(test_values_np), abs=bin_width / 4)
+    assert params[sigma1]['value'] == pytest.approx(np.std(test_values_np), abs=bin_width / 2)
+
+
+class GaussNoIntegral(zfit.core.basepdf.BasePDF):
+
+    def _unnormalized_pdf(self, x, norm_range=False):
+        return tf.exp((-(x - mu_true) ** 2) / (2 * sigma_true ** 2))
+
+
+def test_binned_nll_numeric_integral():
+    test_values = ztf.constant(test_values_np)
+    gauss_no_integral = GaussNoIntegral(obs=obs1, name="gauss_no_integral")
+    gauss_analytic = Gauss(mu=mu_true, sigma=sigma_true, obs=obs1, name="gauss_analytic")
+    with pytest.raises(NotImplementedError):
+        gauss_no_integral.analytic_integrate(limits=(low, high), norm_range=False)
+
+    nll_numeric = zfit.loss.BinnedNLL(model=gauss_no_integral, data=test_values, fit_range=(low, high),
+                                      n_bins=50)
+    nll_analytic = zfit.loss.BinnedNLL(model=gauss_analytic, data=test_values, fit_range=(low, high),
+                                       n_bins=50)
+    assert zfit.run(nll_numeric.value()) == pytest.approx(zfit.run(nll_analytic.value()), rel=1e-6)
+
+
+def test_binned_nll_graph_size():
+    test_values = ztf.constant(test_values_np)
+    n_ops = []
+    for n_bins in (10, 1000):
+        n_ops_before = len(tf.get_default_graph().get_operations())
+        zfit.loss.BinnedNLL(model=gaussian1, data=test_values, fit_range=(low, high), n_bins=n_bins).value()
+        n_ops.append(len(tf.get_default_graph().get_operations()) - n_ops_before)
+    assert n_ops[1] <= n_ops[0]  # the bin integrals are vectorized
+
+
+def test_extended_binned_nll():
+    test_values = ztf.constant(test_values_np)
+    nll_object = zfit.loss.ExtendedBinnedNLL(model=gaussian3, data=test_values, fit_range=(-20, 20),
+                                             n_bins=80)
+    minimizer = MinuitMinimizer()
+    status = minimizer.minimize(loss=nll_object, params=[mu3, sigma3, yield3])
+    params = status.params
+    assert params[mu3]['value'] == pytest.approx(np.mean(test_values_np), abs=0.1)
+    assert params[sigma3]['value'] == pytest.approx(np.std(test_values_np), abs=0.2)
+    assert params[yield3]['value'] == pytest.approx(np.sum(np.abs(test_values_np) <= 20), rel=0.005)
+
+
+def test_unbinned_nll_fit_range():
+    fit_range = (-3., 5.)
+    test_values_in_range = test_values_np[np.logical_and(fit_range[0] <= test_values_np,
+                                                         test_values_np <= fit_range[1])]
+    nll_object = UnbinnedNLL(model=gaussian1, data=ztf.constant(test_values_np), fit_range=fit_range)
+    nll_in_range = UnbinnedNLL(model=gaussian1, data=ztf.constant(test_values_in_range), fit_range=fit_range)
+    assert zfit.run(nll_object.value()) == pytest.approx(zfit.run(nll_in_range.value()), rel=1e-8)
+
+
+@pytest.mark.parametrize("convert_data", [np.array, list, tf.Variable])
+def test_unbinned_nll_data_types(convert_data):
+    fit_range = (-3., 5.)
+    test_values_in_range = test_values_np[np.logical_and(fit_range[0] <= test_values_np,
+                                                         test_values_np <= fit_range[1])]
+    data = convert_data(test_values_np)
+    if isinstance(data, tf.Variable):
+        zfit.run(data.initializer)
+    nll_object = UnbinnedNLL(model=[gaussian1], data=[data], fit_range=[fit_range])
+    assert isinstance(nll_object.data[0], zfit.data.Data)
+    nll_in_range = UnbinnedNLL(model=gaussian1, data=ztf.constant(test_values_in_range), fit_range=fit_range)
+    assert zfit.run(nll_object.value()) == pytest.approx(zfit.run(nll_in_range.value()), rel=1e-8)
+
+
+def test_unbinned_nll_invalid_data():
+    with pytest.raises(TypeError):
+        UnbinnedNLL(model=[gaussian1], data=[{'obs1': test_values_np}], fit_range=[(low, high)])
+
+
+def test_weighted_unbinned_nll():
+    data = zfit.data.Data.from_numpy(obs=obs1, array=test_values_np[None, :])
+    unit_weights_data = data.with_weights(np.ones_like(test_values_np))
+    nll_value = zfit.run(UnbinnedNLL(model=gaussian1, data=data, fit_range=(low, high)).value())
+    unit_weights_nll = UnbinnedNLL(model=gaussian1, data=unit_weights_data, fit_range=(low, high))
+    assert zfit.run(unit_weights_nll.value()) == pytest.approx(nll_value, rel=1e-8)
+
+    double_weights_data = data.with_weights(2 * np.ones_like(test_values_np))
+    double_weights_nll = UnbinnedNLL(model=gaussian1, data=double_weights_data, fit_range=(low, high))
+    assert zfit.run(double_weights_nll.value()) == pytest.approx(2 * nll_value, rel=1e-8)
+
+    minimizer = MinuitMinimizer()
+    result = minimizer.minimize(loss=unit_weights_nll, params=[mu1, sigma1])
+    hesse = result.hesse(params=[mu1, sigma1])
+    hesse_sumw2 = result.hesse(params=[mu1, sigma1], method='sumw2_hesse')
+    for param in (mu1, sigma1):  # with unit weights, the correction does not change anything
+        assert hesse_sumw2[param]['error'] == pytest.approx(hesse[param]['error'], rel=0.02)
+
+    # with constant weights of 2, the corrected covariance is the one of the unweighted fit
+    covariance = result.covariance(params=[mu1, sigma1], method='autodiff_hesse')
+    result_double = minimizer.minimize(loss=double_weights_nll, params=[mu1, sigma1])
+    covariance_double = result_double.covariance(params=[mu1, sigma1], method='sumw2_hesse')
+    np.testing.assert_allclose(covariance_double, covariance, rtol=1e-3, atol=1e-8)
+    assert result_double.covariance(params=[mu1, sigma1], method='autodiff_hesse') == pytest.approx(
+        covariance / 2, rel=1e-3)
+
+    weights = np.random.uniform(0.2, 1.8, size=test_values_np.shape)
+    weighted_nll = UnbinnedNLL(model=gaussian1, data=data.with_weights(weights), fit_range=(low, high),
+                               constraints=zfit.constraint.nll_gaussian(params=[mu1], mu=[mu_true],
+                                                                        sigma=[0.5]))
+    result_weighted = minimizer.minimize(loss=weighted_nll, params=[mu1, sigma1])
+    covariance_weighted = result_weighted.covariance(params=[mu1, sigma1], method='sumw2_hesse')
+    assert np.all(np.linalg.eigvalsh(covariance_weighted) > 0)
+    assert not np.allclose(covariance_weighted,
+                           result_weighted.covariance(params=[mu1, sigma1], method='autodiff_hesse'),
+                           rtol=1e-2)
+
+
+def test_autodiff_hesse():
+    test_values = ztf.constant(test_values_np)
+    nll_object = UnbinnedNLL(model=gaussian1, data=test_values, fit_range=(low, high))
+    minimizer = MinuitMinimizer()
+    result = minimizer.minimize(loss=nll_object, params=[mu1, sigma1])
+    hesse = result.hesse(params=[mu1, sigma1])
+    hesse_autodiff = result.hesse(params=[mu1, sigma1], method='autodiff_hesse')
+    for param in (mu1, sigma1):
+        assert hesse_autodiff[param]['error'] == pytest.approx(hesse[param]['error'], rel=0.02)
+
+    covariance = result.covariance(params=[sigma1, mu1])
+    assert covariance.shape == (2, 2)
+    np.testing.assert_allclose(covariance, covariance.T)
+    assert np.sqrt(covariance[0, 0]) == pytest.approx(hesse_autodiff[sigma1]['error'], rel=1e-6)
+    correlation = result.correlation()
+    np.testing.assert_allclose(np.diag(correlation), 1.)
+    assert abs(correlation[0, 1]) < 0.2  # mean and width of a gaussian are uncorrelated
+    assert result.covariance(params=[sigma1, mu1]) is not None
+    assert 'autodiff_hesse' in result._covariances  # calculated once
+
+    covariance_minuit = result.covariance(method='minuit_hesse')
+    np.testing.assert_allclose(covariance_minuit, result.covariance(), rtol=0.05, atol=1e-4)
+
+    values, values_covariance = result.propagate_errors([mu1 + sigma1, 2. * mu1])
+    full_covariance = result.covariance()
+    assert values == pytest.approx([result.params[mu1]['value'] + result.params[sigma1]['value'],
+                                    2 * result.params[mu1]['value']])
+    assert values_covariance[0, 0] == pytest.approx(np.sum(full_covariance), rel=1e-6)
+    assert values_covariance[1, 1] == pytest.approx(4 * full_covariance[0, 0], rel=1e-6)
+
+
+def test_autodiff_hesse_chunked():
+    test_values = ztf.constant(test_values_np)
+    nll_object = UnbinnedNLL(model=gaussian1, data=test_values, fit_range=(low, high))
+    result = MinuitMinimizer().minimize(loss=nll_object, params=[mu1, sigma1])
+    covariance = result.covariance(params=[mu1, sigma1])
+
+    zfit.run.chunking.active = True
+    zfit.run.chunking.max_n_points = 150
+    try:
+        nll_object_chunked = UnbinnedNLL(model=gaussian1, data=test_values, fit_range=(low, high))
+        result_chunked = MinuitMinimizer().minimize(loss=nll_object_chunked, params=[mu1, sigma1])
+        covariance_chunked = result_chunked.covariance(params=[mu1, sigma1])
+        hesse_chunked = result_chunked.hesse(params=[mu1, sigma1], method='autodiff_hesse')
+    finally:
+        zfit.run.chunking.active = False
+        zfit.run.chunking.max_n_points = 100000
+
+    np.testing.assert_allclose(covariance_chunked, covariance, rtol=1e-3, atol=1e-6)
+    for i, param in enumerate((mu1, sigma1)):
+        assert hesse_chunked[param]['error'] == pytest.approx(np.sqrt(covariance[i, i]), rel=1e-3)
+
+
+@pytest.mark.parametrize("minimizer_class_and_kwargs",
+                         [(zfit.minimize.ScipyMinimizer, {}),
+                          (zfit.minimize.AdamMinimizer, dict(learning_rate=0.1, tolerance=1e-4))])
+def test_autodiff_hesse_minimizers(minimizer_class_and_kwargs):
+    test_values = ztf.constant(test_values_np)
+    nll_object = UnbinnedNLL(model=gaussian1, data=test_values, fit_range=(low, high))
+    result_minuit = MinuitMinimizer().minimize(loss=nll_object, params=[mu1, sigma1])
+    hesse_minuit = result_minuit.hesse(params=[mu1, sigma1])
+
+    mu1.load(mu_true - 0.2)
+    sigma1.load(sigma_true - 0.3)
+    minimizer_class, minimizer_kwargs = minimizer_class_and_kwargs
+    result = minimizer_class(**minimizer_kwargs).minimize(loss=nll_object, params=[mu1, sigma1])
+    assert result.loss is nll_object
+    hesse_autodiff = result.hesse(params=[mu1, sigma1], method='autodiff_hesse')
+    for param in (mu1, sigma1):
+        assert hesse_autodiff[param]['error'] == pytest.approx(hesse_minuit[param]['error'], rel=0.05)
+    assert result.covariance().shape == (2, 2)
+
+
 def test_unbinned_nll():
     # zfit.run(init)
 
@@ -158,3 +473,72 @@ def test_add():
     assert simult_nll.fit_range == ranges
 
     assert simult_nll.constraints == merged_contraints
+
+
+def test_unbinned_nll_chunked():
+    test_values = ztf.constant(test_values_np)
+    nll_object = UnbinnedNLL(model=gaussian1, data=test_values, fit_range=(low, high))
+    nll = nll_object.value()
+    gradients = tf.gradients(nll, [mu1, sigma1])
+    nll_value, gradients_value = zfit.run([nll, gradients])
+
+    zfit.run.chunking.active = True
+    zfit.run.chunking.max_n_points = 150  # does not divide the number of events
+    try:
+        nll_object_chunked = UnbinnedNLL(model=gaussian1, data=test_values, fit_range=(low, high))
+        nll_chunked = nll_object_chunked.value()
+        gradients_chunked = tf.gradients(nll_chunked, [mu1, sigma1])
+        nll_chunked_value, gradients_chunked_value = zfit.run([nll_chunked, gradients_chunked])
+    finally:
+        zfit.run.chunking.active = False
+        zfit.run.chunking.max_n_points = 100000
+
+    assert nll_chunked_value == pytest.approx(nll_value, rel=1e-8)
+    assert gradients_chunked_value == pytest.approx(gradients_value, rel=1e-6)
+
+
+def test_unbinned_nll_chunked_npy(tmpdir, monkeypatch):
+    import zfit.core.data
+
+    test_values = ztf.constant(test_values_np)
+    nll = UnbinnedNLL(model=gaussian1, data=test_values, fit_range=(low, high)).value()
+    nll_value = zfit.run(nll)
+
+    read_rows = []
+
+    def recording_read_npy_rows(columns, start, stop):
+        rows = zfit_read_npy_rows(columns=columns, start=start, stop=stop)
+        read_rows.append(rows.shape[1])
+        return rows
+
+    zfit_read_npy_rows = zfit.core.data._read_npy_rows
+    monkeypatch.setattr(zfit.core.data, '_read_npy_rows', recording_read_npy_rows)
+
+    def create_nll(n_events):
+        path = str(tmpdir.join('obs1_{}.npy'.format(len(tmpdir.listdir()))))  # a new file every time
+        values = np.zeros(n_events, dtype=[(obs1, np.float64)])
+        values[obs1] = np.resize(test_values_np, n_events)
+        np.save(path, values)
+        data = zfit.data.Data.from_npy(path=path, obs=obs1)
+        return UnbinnedNLL(model=gaussian1, data=data, fit_range=(low, high)).value()
+
+    zfit.run.chunking.active = True
+    zfit.run.chunking.max_n_points = 150
+    try:
+        nll_npy = create_nll(n_events=yield_true)
+        graph = tf.get_default_graph()
+        n_ops = len(graph.get_operations())
+        create_nll(n_events=yield_true)
+        n_ops_small = len(graph.get_operations()) - n_ops
+        create_nll(n_events=100 * yield_true)
+        n_ops_large = len(graph.get_operations()) - n_ops - n_ops_small
+        del read_rows[:]
+        nll_npy_value = zfit.run(nll_npy)
+    finally:
+        zfit.run.chunking.active = False
+        zfit.run.chunking.max_n_points = 100000
+
+    assert nll_npy_value == pytest.approx(nll_value, rel=1e-8)
+    assert n_ops_large == n_ops_small  # the graph does not grow with the number of events
+    assert max(read_rows) <= 150  # only one chunk is read at a time
+    assert sum(read_rows) == yield_true  # every event is read once for the value
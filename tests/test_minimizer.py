@@ -157,3 +157,71 @@ minimizers = [
 def test_minimizers(minimizer_class):
     # for minimizer_class in minimizers:
     minimize_func(minimizer_class)
+
+
+@pytest.mark.parametrize("prebuilt", [False, True])
+def test_loss_eval(prebuilt):
+    from zfit.core.parameter import Parameter
+    from zfit.minimizers.evaluator import LossEval
+
+    param_a = Parameter("loss_eval_a_{}".format(prebuilt), 1.)
+    param_b = Parameter("loss_eval_b_{}".format(prebuilt), 2.)
+
+    def loss_func():
+        return (param_a - 3.) ** 2 + 2. * (param_b + 1.) ** 2
+
+    loss_tensor = loss_func()
+    loss = SimpleLoss(lambda: loss_tensor) if prebuilt else SimpleLoss(loss_func)
+
+    loss_eval = LossEval(loss=loss, params=[param_a, param_b])
+    session_runs = []
+    run = loss_eval.sess.run
+
+    def counting_run(*args, **kwargs):
+        session_runs.append(args)
+        return run(*args, **kwargs)
+
+    loss_eval.sess.run = counting_run
+    try:
+        assert loss_eval.value([3., -1.]) == pytest.approx(0.)
+        assert loss_eval.value([3., -1.]) == pytest.approx(0.)
+        assert loss_eval.n_eval == 1  # memoized
+        # a prebuilt loss tensor reads the parameters before they are loaded: load in a separate run
+        assert len(session_runs) == (2 if prebuilt else 1)
+        assert list(loss_eval.gradient([3., -1.])) == pytest.approx([0., 0.])
+        assert loss_eval.n_eval == 2  # the gradient is only evaluated when requested
+
+        value, gradient = loss_eval.value_gradient([1., 1.])
+        assert value == pytest.approx(12.)
+        assert list(gradient) == pytest.approx([-4., 8.])
+        assert loss_eval.n_eval == 3
+        assert loss_eval.value([1., 1.]) == pytest.approx(12.)
+        assert loss_eval.n_eval == 3
+
+        loss_eval.fuse_gradient = True
+        assert loss_eval.value([2., 0.]) == pytest.approx(3.)
+        assert list(loss_eval.gradient([2., 0.])) == pytest.approx([-2., 4.])
+        assert loss_eval.n_eval == 4  # value and gradient at the same point are evaluated together
+    finally:
+        del loss_eval.sess.run
+    assert zfit.run([param_a, param_b]) == pytest.approx([2., 0.])
+    assert (loss_eval._loading_tensors is None) == prebuilt
+
+
+def test_minimize_init():
+    from zfit.core.parameter import Parameter
+
+    param_a = Parameter("init_a", 1.)
+    param_b = Parameter("init_b", 2.)
+    loss_tensor = ((param_a - 3.) / 0.01) ** 2 + ((param_b + 1.) / 5.) ** 2
+    loss = SimpleLoss(lambda: loss_tensor)
+    minimizer = zfit.minimize.MinuitMinimizer()
+
+    result = minimizer.minimize(loss=loss, params=[param_a, param_b])
+    param_a.load(1.)
+    param_b.load(2.)
+    result_init = minimizer.minimize(loss=loss, params=[param_a, param_b], init=result)
+    assert result_init.params[param_a]['value'] == pytest.approx(3., abs=1e-3)
+    assert result_init.params[param_b]['value'] == pytest.approx(-1., abs=1e-2)
+    assert result_init.info['n_eval'] < result.info['n_eval']
+    assert param_a._step_size is None  # only set during the minimization
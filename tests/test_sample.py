@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+import tensorflow as tf
+
+import zfit
+from zfit.core.limits import Space
+from zfit.core.sample import accept_reject_sample
+
+mu_true = 0.5
+sigma_true = 1.2
+limits = Space.from_axes(limits=(mu_true - 5 * sigma_true, mu_true + 5 * sigma_true), axes=(0,))
+
+
+def gauss_unnormalized(x):
+    return tf.exp(-(x[0] - mu_true) ** 2 / (2 * sigma_true ** 2))
+
+
+@pytest.mark.parametrize("prob_max", [None, 0.1])  # 0.1 is too small, the majorant has to be raised
+def test_accept_reject_sample(prob_max):
+    n_draws = 20000
+    sample = accept_reject_sample(prob=gauss_unnormalized, n=n_draws, limits=limits, prob_max=prob_max,
+                                  max_batch_size=3000)
+    sample = zfit.run(sample)
+
+    assert sample.shape == (1, n_draws)
+    assert np.min(sample) >= mu_true - 5 * sigma_true
+    assert np.max(sample) <= mu_true + 5 * sigma_true
+    assert np.mean(sample) == pytest.approx(mu_true, abs=0.05)
+    assert np.std(sample) == pytest.approx(sigma_true, rel=0.03)
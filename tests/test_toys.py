@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+import tensorflow as tf
+
+import zfit
+from zfit.core.toys import ToyStudy, run_toys
+
+mu_true = 0.8
+sigma_true = 1.3
+limits = (-4., 6.)
+
+
+def create_gauss_study():
+    mu = zfit.Parameter("mu_toys", mu_true, -2., 3.)
+    sigma = zfit.Parameter("sigma_toys", sigma_true, 0.3, 4.)
+    gauss = zfit.pdf.Gauss(mu=mu, sigma=sigma, obs=zfit.Space(obs='obs1', limits=limits))
+    return ToyStudy(model=gauss, n_events=2000)
+
+
+def create_gauss_study_scipy():
+    mu = zfit.Parameter("mu_toys_scipy", mu_true, -2., 3.)
+    sigma = zfit.Parameter("sigma_toys_scipy", sigma_true, 0.3, 4.)
+    gauss = zfit.pdf.Gauss(mu=mu, sigma=sigma, obs=zfit.Space(obs='obs1', limits=limits))
+    return ToyStudy(model=gauss, n_events=2000, minimizer=zfit.minimize.ScipyMinimizer())
+
+
+def create_gauss_study_one_cpu():
+    mu = zfit.Parameter("mu_toys_one_cpu", mu_true, -2., 3.)
+    sigma = zfit.Parameter("sigma_toys_one_cpu", sigma_true, 0.3, 4.)
+    gauss = zfit.pdf.Gauss(mu=mu, sigma=sigma, obs=zfit.Space(obs='obs1', limits=limits))
+    return ToyStudy(model=gauss, n_events=2000)
+
+
+def test_toy_study():
+    n_toys = 5
+    results = run_toys(create_study=create_gauss_study, n_toys=n_toys, n_workers=1, seed=42)
+
+    assert list(results) == ['mu_toys', 'mu_toys_error', 'sigma_toys', 'sigma_toys_error',
+                             'fmin', 'edm', 'converged']
+    for column in results.values():
+        assert len(column) == n_toys
+    assert np.all(results['converged'])
+    assert len(set(results['fmin'])) == n_toys  # a new sample for every toy
+    pulls = (results['mu_toys'] - mu_true) / results['mu_toys_error']
+    assert np.all(np.abs(pulls) < 5)
+    assert np.mean(results['sigma_toys']) == pytest.approx(sigma_true, rel=0.1)
+
+
+def test_toy_study_scipy():
+    graph_seed = tf.get_default_graph().seed
+    results = run_toys(create_study=create_gauss_study_scipy, n_toys=3, n_workers=1, seed=42)
+    assert tf.get_default_graph().seed == graph_seed  # the seed is only set for the study
+    pulls = (results['mu_toys_scipy'] - mu_true) / results['mu_toys_scipy_error']
+    assert np.all(np.abs(pulls) < 5)
+
+
+def test_toy_study_workers():
+    n_toys = 4
+    results = run_toys(create_study=create_gauss_study, n_toys=n_toys, n_workers=2, seed=42)
+    for column in results.values():
+        assert len(column) == n_toys
+    assert np.all(results['converged'])
+    assert len(set(results['fmin'])) == n_toys  # the workers have different seeds
+
+
+def test_toy_study_workers_one_cpu(monkeypatch):
+    import zfit.core.toys
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError("No worker processes should be started with only one CPU.")
+
+    monkeypatch.setattr(zfit.core.toys.multiprocessing, 'get_context', no_pool)
+    with zfit.run.aquire_cpu(max_cpu=zfit.run.n_cpu - 1):  # leave one CPU
+        results = run_toys(create_study=create_gauss_study_one_cpu, n_toys=2, n_workers=2, seed=42)
+    assert len(results['fmin']) == 2
@@ -6,7 +6,7 @@ __email__ = 'zfit@physik.uzh.ch'
 __version__ = '0.0.0'
 
 from . import ztf
-from . import constraint, pdf, minimize, loss, core, data, func
+from . import constraint, pdf, minimize, loss, core, data, func, toys
 from .core.parameter import Parameter
 from .core.limits import Space, convert_to_space, supports
 
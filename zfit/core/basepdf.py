@@ -53,16 +53,19 @@ import abc
 from collections import OrderedDict
 import contextlib
 from contextlib import suppress
+import time
 from typing import Union, Iterable, Any, Type
 import warnings
 
 import tensorflow as tf
 
 from zfit import ztf
-from .interfaces import ZfitPDF
+from .interfaces import ZfitData, ZfitPDF
 from .limits import Space
 from ..util import ztyping
+from ..util.cache import cache_value_by_params
 from ..util.container import convert_to_container
+from ..util.graph import graph_build_profiler, in_control_flow_or_dependencies
 from ..util.exception import (DueToLazynessNotImplementedError, IntentionNotUnambiguousError, AlreadyExtendedPDFError,
                               NormRangeNotSpecifiedError, )
 from ..util.temporary import TemporarilySet
@@ -71,6 +74,12 @@ from .parameter import Parameter, convert_to_parameter
 from ..settings import ztypes
 
 _BasePDF_USER_IMPL_METHODS_TO_CHECK = {}
+_pdf_cache_generation = [0]  # part of the key of the cached `pdf` graphs
+
+
+def _invalidate_pdf_caches():
+    """Prevent the reuse of all graphs built by `pdf` so far, e.g. if the yield of a model changed."""
+    _pdf_cache_generation[0] += 1
 
 
 def _BasePDF_register_check_support(has_support: bool):
@@ -102,6 +111,8 @@ def _BasePDF_register_check_support(has_support: bool):
 
 
 class BasePDF(ZfitPDF, BaseModel):
+    _DEFAULT_cache_normalization = True
+    _DEFAULT_pdf_cache_size = 64  # maximum number of graphs of `pdf` kept for reuse
 
     def __init__(self, obs: ztyping.ObsTypeInput, dtype: Type = ztypes.float, name: str = "BasePDF",
                  parameters: Any = None, **kwargs):
@@ -110,7 +121,8 @@ class BasePDF(ZfitPDF, BaseModel):
         self._yield = None
         self._temp_yield = None
         self._norm_range = None
-        self._normalization_value = None
+        self.cache_normalization = self._DEFAULT_cache_normalization
+        self._pdf_cache = OrderedDict()  # least recently used first
 
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
@@ -188,6 +200,7 @@ class BasePDF(ZfitPDF, BaseModel):
         norm_range = self._check_input_norm_range(norm_range=norm_range)
 
         def setter(value):
+            _invalidate_pdf_caches()
             self._norm_range = value
 
         def getter():
@@ -233,11 +246,16 @@ class BasePDF(ZfitPDF, BaseModel):
         return self._call_normalization(limits=limits, name=name)  # no _norm_* needed
 
     def _call_normalization(self, limits, name):
-        # TODO: caching? alternative
         with self._name_scope(name, values=[limits]):
-            with suppress(NotImplementedError):
-                return self._normalization(limits=limits)
-            return self._fallback_normalization(limits)
+            if self.cache_normalization:
+                return cache_value_by_params(func=lambda: self._call_normalization_uncached(limits=limits),
+                                             params=self.get_dependents(only_floating=False))
+            return self._call_normalization_uncached(limits=limits)
+
+    def _call_normalization_uncached(self, limits):
+        with suppress(NotImplementedError):
+            return self._normalization(limits=limits)
+        return self._fallback_normalization(limits)
 
     def _fallback_normalization(self, limits):
         return self._hook_integrate(limits=limits, norm_range=False)
@@ -289,8 +307,34 @@ class BasePDF(ZfitPDF, BaseModel):
           model: a `Tensor` of type `self.dtype`.
         """
         norm_range = self._check_input_norm_range(norm_range, caller_name=name, none_is_error=True)
-        with self._convert_sort_x(x) as x:
-            return self._single_hook_pdf(x=x, norm_range=norm_range, name=name)
+        cache_key = self._pdf_cache_key(x=x, norm_range=norm_range)
+        if cache_key is not None and cache_key in self._pdf_cache:
+            graph_build_profiler.record(name=self.name, cached=True)
+            self._pdf_cache.move_to_end(cache_key)
+            return self._pdf_cache[cache_key][1]
+        start = time.time()
+        with self._convert_sort_x(x) as x_sorted:
+            probability = self._single_hook_pdf(x=x_sorted, norm_range=norm_range, name=name)
+        graph_build_profiler.record(name=self.name, duration=time.time() - start)
+        if cache_key is not None:
+            self._pdf_cache[cache_key] = (x, probability)  # keeps `x` alive, its id is in the key
+            if len(self._pdf_cache) > self._DEFAULT_pdf_cache_size:  # release the oldest graph and `x`
+                self._pdf_cache.popitem(last=False)
+        return probability
+
+    def _pdf_cache_key(self, x, norm_range):
+        """Return the key to reuse the graph of `pdf` for the same `x` and `norm_range`, None to not cache."""
+        graph = tf.get_default_graph()
+        if not isinstance(x, (tf.Tensor, ZfitData)) or in_control_flow_or_dependencies(graph):
+            return None
+        x_space = (x.obs, x.axes) if isinstance(x, ZfitData) else None  # may be sorted temporarily
+        key = (graph, id(x), x_space, norm_range.obs, norm_range.axes, norm_range.limits,
+               _pdf_cache_generation[0])
+        try:
+            hash(key)
+        except TypeError:  # limits that are Tensors
+            return None
+        return key
 
     def _single_hook_pdf(self, x, norm_range, name):
         probability = self._hook_pdf(x=x, norm_range=norm_range, name=name)
@@ -412,6 +456,7 @@ class BasePDF(ZfitPDF, BaseModel):
 
         # TODO(Mayou36): check input for yield?
         def setter(value):
+            _invalidate_pdf_caches()
             self._set_yield(value=value)
 
         def getter():
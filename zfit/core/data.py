@@ -1,10 +1,18 @@
 from collections import OrderedDict
+import ast
+import builtins
+import hashlib
+import os
+import queue
+import tempfile
+import threading
 from typing import List, Tuple
 import warnings
 
 import tensorflow as tf
 from tensorflow.python.framework import ops
 from tensorflow.python.ops import array_ops
+from tensorflow.python.ops.resource_variable_ops import ResourceVariable
 import uproot
 import numpy as np
 
@@ -24,7 +32,8 @@ from ..util.temporary import TemporarilySet
 
 class Data(ZfitData, BaseDimensional, BaseObject):
 
-    def __init__(self, dataset, obs=None, name=None, iterator_feed_dict=None, dtype=ztypes.float):
+    def __init__(self, dataset, obs=None, name=None, iterator_feed_dict=None, dtype=ztypes.float,
+                 weights=None):
 
         if name is None:
             name = "Data"
@@ -32,6 +41,7 @@ class Data(ZfitData, BaseDimensional, BaseObject):
         if iterator_feed_dict is None:
             iterator_feed_dict = {}
         self._data_range = None
+        self._range_views = {}
         self._permutation_indices_data = None
         self._next_batch = None
         self._dtype = dtype
@@ -41,11 +51,144 @@ class Data(ZfitData, BaseDimensional, BaseObject):
         self._name = name
         self.iterator_feed_dict = iterator_feed_dict
         self.iterator = None
+        self._chunk_reader = None
+        self._n_chunk_rows = None
+        self.set_weights(weights=weights)
 
     @property
     def dtype(self):
         return self._dtype
 
+    @property
+    def weights(self):
+        """The weights of the events as a Tensor with shape (n_events,) or None if they are not weighted."""
+        return self._weights
+
+    def set_weights(self, weights: ztyping.WeightsInputType):
+        """Set the weights of the events.
+
+        Args:
+            weights (numpy.ndarray, tf.Tensor, None): One weight per event. A numpy array is stored in a
+                non-trainable variable (instead of a constant in the graph). None removes the weights.
+        """
+        if isinstance(weights, (np.ndarray, list, tuple)):
+            weights = np.asarray(weights, dtype=self.dtype.as_numpy_dtype)
+            weights_placeholder = tf.placeholder(dtype=self.dtype, shape=weights.shape)
+            weights_var = ResourceVariable(initial_value=weights_placeholder, trainable=False,
+                                           name="weights")
+            zfit.run(weights_var.initializer, feed_dict={weights_placeholder: weights})
+            weights = weights_var.read_value()
+        elif weights is not None:
+            weights = ztf.convert_to_tensor(weights, dtype=self.dtype)
+        self._weights = weights
+
+    def with_weights(self, weights: ztyping.WeightsInputType) -> "Data":
+        """Return a `Data` with the same events (sharing the dataset) but with other `weights`."""
+        data = Data(dataset=self.dataset, obs=self.space, name=self.name,
+                    iterator_feed_dict=self.iterator_feed_dict, dtype=self.dtype, weights=weights)
+        data._data_range = self._data_range
+        if self._chunk_reader is not None:  # stream the same events, with the other weights
+            def read_chunk(start, stop):
+                values, _ = self._chunk_reader(start, stop)
+                return values, None if data.weights is None else data.weights[start:stop]
+
+            data._set_chunk_reader(read_chunk=read_chunk, n_rows=self._n_chunk_rows)
+        return data
+
+    def _set_chunk_reader(self, read_chunk, n_rows):
+        """Read the events chunk by chunk with `read_chunk` instead of slicing the full `value`.
+
+        Args:
+            read_chunk (callable): Takes the first and the last (exclusive) row (int32 scalar Tensors) and
+                returns the values in these rows with shape (n_obs, n_events), with the observables in the
+                order of the dataset, and their weights (or None). The number of events can be smaller than
+                the number of rows, e.g. for a range view.
+            n_rows (int, tf.Tensor): The number of rows `read_chunk` can read.
+        """
+        self._chunk_reader = read_chunk
+        self._n_chunk_rows = n_rows
+
+    def n_chunks(self, chunksize: int) -> tf.Tensor:
+        """Return the number of chunks of `chunksize` rows needed to cover all events with `chunk`."""
+        n_rows = self._n_chunk_rows
+        if n_rows is None:
+            n_rows = tf.shape(self.value())[1]
+        return (ztf.convert_to_tensor(n_rows, dtype=tf.int32) + chunksize - 1) // chunksize
+
+    def chunk(self, start: tf.Tensor, stop: tf.Tensor, obs: ztyping.ObsTypeInput = None):
+        """Return the events in the rows `start` to `stop` (exclusive) and their weights.
+
+        Data streamed from disk (e.g. `from_npy`) reads only these rows, so only one chunk of the
+        events exists at a time if the chunks are evaluated sequentially (see `ztf.chunked_sum`).
+
+        Args:
+            start (int, tf.Tensor): The first row.
+            stop (int, tf.Tensor): The row after the last one, can be larger than the number of rows.
+            obs (str, list(str)): The observables to return in this order, the current ones if None.
+
+        Returns:
+            tuple(tf.Tensor, tf.Tensor): The values with shape (n_obs, n_events) and the weights with
+                shape (n_events,) or None if the events are not weighted.
+        """
+        obs = convert_to_container(value=obs, container=tuple)
+        if self._chunk_reader is None:
+            weights = None if self.weights is None else self.weights[start:stop]
+            return self.value(obs=obs)[:, start:stop], weights
+        values, weights = self._chunk_reader(start, stop)
+        return self._sort_values(values, obs=obs), weights
+
+    def filter_range(self, limits: Space) -> "Data":
+        """Return a view of the events inside `limits`, created only once for every `limits`.
+
+        The events (and their weights) outside of `limits` are removed with a mask in the graph, so the view
+        follows changes of the underlying dataset. With several limits, an event is kept if it is inside any
+        of them.
+
+        Args:
+            limits (Space): The range to keep. Its observables have to be contained in the data.
+
+        Returns:
+            Data: The events inside `limits` with the observables of this data and `limits` as `data_range`.
+        """
+        if limits.limits is None or limits.limits is False:
+            return self
+        if self._data_range is not None and limits == self._data_range:
+            return self
+        view = self._range_views.get(limits)
+        if view is None:
+            x = self.value()
+            x_limits = self.value(obs=limits.obs)
+            in_range = self._in_range(x_limits, limits=limits)
+            weights = None if self.weights is None else tf.boolean_mask(self.weights, mask=in_range)
+            dataset = LightDataset.from_tensor(tf.boolean_mask(x, mask=in_range, axis=1))
+            view = Data(dataset=dataset, obs=self.obs, name=self.name + "_in_range", dtype=self.dtype,
+                        weights=weights)
+            view._data_range = limits
+            if self._chunk_reader is not None:  # filter every chunk instead of the full events
+                obs = self.obs
+                limits_indices = [obs.index(ob) for ob in limits.obs]
+
+                def read_chunk(start, stop):
+                    values, chunk_weights = self.chunk(start, stop, obs=obs)
+                    chunk_in_range = self._in_range(tf.gather(values, limits_indices), limits=limits)
+                    if chunk_weights is not None:
+                        chunk_weights = tf.boolean_mask(chunk_weights, mask=chunk_in_range)
+                    return tf.boolean_mask(values, mask=chunk_in_range, axis=1), chunk_weights
+
+                view._set_chunk_reader(read_chunk=read_chunk, n_rows=self._n_chunk_rows)
+            self._range_views[limits] = view
+        return view
+
+    def _in_range(self, x_limits, limits):
+        """Return a mask of the events in `x_limits` (with the obs of `limits`) that are inside any limit."""
+        in_range = None
+        for lower, upper in limits.iter_limits(as_tuple=True):
+            lower = tf.reshape(ztf.convert_to_tensor(lower, dtype=self.dtype), shape=(-1, 1))
+            upper = tf.reshape(ztf.convert_to_tensor(upper, dtype=self.dtype), shape=(-1, 1))
+            in_limit = tf.reduce_all(tf.logical_and(lower <= x_limits, x_limits <= upper), axis=0)
+            in_range = in_limit if in_range is None else tf.logical_or(in_range, in_limit)
+        return in_range
+
     def _set_space(self, obs: Space):
         obs = convert_to_space(obs)
         obs = obs.with_autofill_axes()
@@ -75,39 +218,131 @@ class Data(ZfitData, BaseDimensional, BaseObject):
     # constructor
 
     @classmethod
-    def from_root_iter(cls, path, treepath, branches=None, entrysteps=None, name=None, **kwargs):
-        # branches = convert_to_container(branches)
+    def from_root_iter(cls, path, treepath, branches=None, entrysteps=None, name=None, cut=None, n_prefetch=2,
+                       **kwargs):
+        """Create a `Data` that iterates over the `branches` of a ROOT tree in chunks of `entrysteps` events.
+
+        Every evaluation of the data gives the next chunk. The following chunks are read in a background
+        thread while the current one is used.
+
+        Args:
+            path (str): The path to the ROOT file(s).
+            treepath (str): The path of the tree in the file(s).
+            branches (list(str)): The branches to use as observables.
+            entrysteps (int): The number of entries per chunk, the default of `uproot.iterate` if None.
+            name (str):
+            cut (str): Only the events for which this expression is True are used. It is evaluated with
+                numpy on the arrays of the branches it contains, e.g. "(pt > 1000) & (np.abs(eta) < 2)".
+            n_prefetch (int): Number of chunks to read ahead.
+            **kwargs: Given to `uproot.iterate`.
+        """
         warnings.warn("Using the iterator is hardcore! Don't do it if you don't fully understand what happens.")
+        branches = _decode_branches(branches)
 
         def uproot_generator():
-            for data in uproot.iterate(path=path, treepath=treepath,
-                                       branches=branches, entrysteps=entrysteps, **kwargs):
-                data = np.array([data[branch] for branch in branches])
-                yield data
+            return _iterate_root(path=path, treepath=treepath, branches=branches, entrysteps=entrysteps,
+                                 cut=cut, n_prefetch=n_prefetch, **kwargs)
 
-        dataset = tf.data.Dataset.from_generator(uproot_generator, output_types=ztypes.float)
-        dataset.prefetch(2)
-        return Data(dataset=dataset, name=name)
+        dataset = tf.data.Dataset.from_generator(uproot_generator, output_types=ztypes.float,
+                                                 output_shapes=(len(branches), None))
+        dataset = dataset.prefetch(n_prefetch)
+        return Data(dataset=dataset, obs=branches, name=name)
 
     @classmethod
-    def from_root(cls, path, treepath, branches=None, name=None, root_dir_options=None):
-        # branches = convert_to_container(branches)
+    def from_root(cls, path, treepath, branches=None, name=None, root_dir_options=None, weights=None,
+                  entrysteps=None, cut=None, n_prefetch=2, cache_dir=None):
+        """Create a `Data` from the `branches` of a ROOT tree.
+
+        The tree is read only once, chunk by chunk in a background thread, into a contiguous array. If a
+        `cache_dir` is given, this array is stored there in a binary file that is loaded instead of reading
+        the ROOT file the next time the same branches, weights and cut are read from the unmodified file.
+
+        Args:
+            path (str): The path to the ROOT file.
+            treepath (str): The path of the tree in the file.
+            branches (list(str)): The branches to use as observables.
+            name (str):
+            root_dir_options (dict): Given to `uproot.iterate`.
+            weights (str): The branch containing the weights of the events. If None, they are not weighted.
+            entrysteps (int): The number of entries read at once, the default of `uproot.iterate` if None.
+            cut (str): Only the events for which this expression is True are used, see
+                :py:meth:`from_root_iter`.
+            n_prefetch (int): Number of chunks to read ahead.
+            cache_dir (str): The directory to cache the data in. If None, the directory in
+                `zfit.settings.options.data_cache_dir` is used. If that is None as well, nothing is cached.
+        """
+        branches = _decode_branches(branches)
         if root_dir_options is None:
             root_dir_options = {}
+        if cache_dir is None:
+            cache_dir = zfit.settings.options.data_cache_dir
+        read_branches = branches if weights is None else branches + _decode_branches(weights)
+        cache_path = None
+        # lists of files, remote files and patterns are not cached
+        if cache_dir is not None and isinstance(path, str) and os.path.isfile(path):
+            cache_path = _root_cache_path(cache_dir=cache_dir, path=path, treepath=treepath,
+                                          branches=read_branches, cut=cut)
+        if cache_path is not None and os.path.isfile(cache_path):
+            array = np.load(cache_path)
+        else:
+            chunks = _iterate_root(path=path, treepath=treepath, branches=read_branches,
+                                   entrysteps=entrysteps, cut=cut, n_prefetch=n_prefetch, **root_dir_options)
+            chunks = list(chunks)
+            if chunks:
+                array = np.concatenate(chunks, axis=1)
+            else:
+                array = np.empty(shape=(len(read_branches), 0), dtype=ztypes.float.as_numpy_dtype)
+            if cache_path is not None:
+                _save_atomically(path=cache_path, array=array)
+        if weights is not None:
+            array, weights = array[:-1], array[-1]
+        return cls.from_numpy(obs=branches, array=array, name=name, weights=weights)
 
-        def uproot_generator():
-            root_tree = uproot.open(path, **root_dir_options)[treepath]
-            data = root_tree.arrays(branches)
-            data = np.array([data[branch] for branch in branches])
-            yield data
+    @classmethod
+    def from_npy(cls, path, obs, name=None, weights=None):
+        """Create a `Data` from columns in memory-mapped `.npy` files, reading only the observables `obs`.
 
-        dataset = tf.data.Dataset.from_generator(uproot_generator, output_types=ztypes.float)
+        The files are not loaded into memory but read every time the data is evaluated. With chunking
+        (`zfit.run.chunking.active`), the unbinned NLL reads the events with `chunk` in slices of
+        `zfit.run.chunking.max_n_points` rows, one after the other, so only one slice is in memory at a
+        time. This trades the resident copy for reading the file once per evaluation of the value (and
+        once more for the gradient). Evaluating the data as a whole (e.g. with `value` or without
+        chunking) reads all rows of `obs` into a temporary array. Only the weights are kept in memory.
 
-        dataset = dataset.repeat()
-        return Data(dataset=dataset, obs=branches, name=name)
+        Args:
+            path (str): Either a `.npy` file containing a structured array with a field per column or a
+                directory with a file `<column>.npy` per column.
+            obs (str, list(str)): The columns to use as observables.
+            name (str):
+            weights (str, numpy.ndarray): The column containing the weights or the weights themselves. If
+                None, the events are not weighted.
+        """
+        obs = convert_to_container(obs, container=list)
+        columns = _load_npy_columns(path=path, columns=obs)
+        if isinstance(weights, str):
+            weights = np.array(_load_npy_columns(path=path, columns=[weights])[0])
+        n_events = len(columns[0])
+
+        def read_rows(start, stop):
+            return _read_npy_rows(columns=columns, start=start, stop=stop)
+
+        def read_tensor(start, stop, n_rows=None):
+            rows = tf.py_func(read_rows, [start, stop], ztypes.float, stateful=True)
+            rows.set_shape((len(obs), n_rows))
+            return rows
+
+        data = cls.from_tensors(obs=obs, tensors=read_tensor(0, n_events, n_rows=n_events), name=name,
+                                weights=weights)
+
+        def read_chunk(start, stop):
+            chunk_weights = None if data.weights is None else data.weights[start:stop]
+            return read_tensor(start, stop), chunk_weights
+
+        data._set_chunk_reader(read_chunk=read_chunk, n_rows=n_events)
+        return data
 
     @classmethod
-    def from_numpy(cls, obs, array, name=None):
+    def from_numpy(cls, obs, array, name=None, weights=None):
         if not isinstance(array, np.ndarray):
             raise TypeError("`array` has to be a `np..ndarray`. Is currently {}".format(type(array)))
         np_placeholder = tf.placeholder(dtype=array.dtype, shape=array.shape)
@@ -116,14 +351,15 @@ class Data(ZfitData, BaseDimensional, BaseObject):
 
         # dataset = dataset.batch(len(array))
         dataset = dataset.repeat()
-        return Data(dataset=dataset, obs=obs, name=name, iterator_feed_dict=iterator_feed_dict)
+        return Data(dataset=dataset, obs=obs, name=name, iterator_feed_dict=iterator_feed_dict,
+                    weights=weights)
 
     @classmethod
-    def from_tensors(cls, obs, tensors, name=None):
+    def from_tensors(cls, obs, tensors, name=None, weights=None):
         # dataset = tf.data.Dataset.from_tensors(tensors=tensors)
         # dataset = dataset.repeat()
         dataset = LightDataset.from_tensor(tensor=tensors)
-        return Data(dataset=dataset, obs=obs, name=name)
+        return Data(dataset=dataset, obs=obs, name=name, weights=weights)
 
     def initialize(self, sess=None):
         iterator = self.dataset.make_initializable_iterator()
@@ -143,7 +379,10 @@ class Data(ZfitData, BaseDimensional, BaseObject):
 
     def value(self, obs: Tuple[str] = None):
         obs = convert_to_container(value=obs, container=tuple)
-        values = self.get_iteration()
+        return self._sort_values(self.get_iteration(), obs=obs)
+
+    def _sort_values(self, values, obs):
+        """Return `values` in the order of the dataset with the observables `obs` or the current ones."""
         # TODO(Mayou36): add conversion to right dimension? (n_obs, n_events)? # check if 1-D?
         if len(values.shape.as_list()) == 0:
             values = tf.expand_dims(values, 0)
@@ -250,6 +489,139 @@ class Data(ZfitData, BaseDimensional, BaseObject):
         setattr(Data, operator, _run_op)
 
 
+def _decode_branches(branches):
+    """Return the names of `branches` as a list of `str` (they may be given as `bytes` for uproot)."""
+    return [branch.decode() if isinstance(branch, bytes) else branch
+            for branch in convert_to_container(branches, container=list)]
+
+
+def _prefetch(iterable, n_prefetch):
+    """Iterate over `iterable` in a background thread that keeps up to `n_prefetch` items ready.
+
+    If the consumer stops early (the generator is closed or garbage collected), the background thread stops
+    reading and closes `iterable`, so no thread is left holding open files.
+    """
+    if n_prefetch < 1:
+        yield from iterable
+        return
+    items = queue.Queue(maxsize=n_prefetch)
+    stop = threading.Event()
+    finished = object()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)  # check regularly whether to stop
+            except queue.Full:
+                continue
+            return True
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+        except Exception as error:  # raised again in the consuming thread
+            put((None, error))
+        else:
+            put((finished, None))
+        finally:
+            close = getattr(iterable, 'close', None)
+            if close is not None:
+                close()
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = items.get()
+            if error is not None:
+                raise error
+            if item is finished:
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+def _iterate_root(path, treepath, branches, entrysteps=None, cut=None, n_prefetch=2, **kwargs):
+    """Yield the `branches` of the events passing `cut` chunk by chunk, with shape (n_branches, n_events).
+
+    Every chunk is a contiguous float array that the branches are copied into once, while the next chunks
+    are read in a background thread.
+    """
+    cut_branches = []
+    if cut is not None:
+        cut_branches = [node.id for node in ast.walk(ast.parse(cut, mode='eval'))
+                        if isinstance(node, ast.Name) and node.id != 'np' and not hasattr(builtins, node.id)]
+    read_branches = list(OrderedDict.fromkeys(branches + cut_branches))
+
+    def read_chunks():
+        for arrays in uproot.iterate(path=path, treepath=treepath, branches=read_branches,
+                                     entrysteps=entrysteps, namedecode='utf-8', **kwargs):
+            if cut is None:
+                mask = None
+                n_events = len(arrays[read_branches[0]])
+            else:
+                mask = np.asarray(eval(cut, {'np': np}, arrays), dtype=bool)
+                n_events = np.count_nonzero(mask)
+            chunk = np.empty(shape=(len(branches), n_events), dtype=ztypes.float.as_numpy_dtype)
+            for row, branch in zip(chunk, branches):
+                if mask is None:
+                    row[:] = arrays[branch]
+                else:
+                    np.compress(mask, arrays[branch], out=row)
+            yield chunk
+
+    return _prefetch(read_chunks(), n_prefetch=n_prefetch)
+
+
+def _root_cache_path(cache_dir, path, treepath, branches, cut):
+    """Return the path to cache `branches` from `path` in, which changes if the file is modified."""
+    stat = os.stat(path)
+    key = repr((os.path.abspath(path), stat.st_mtime_ns, stat.st_size, treepath, list(branches), cut,
+                ztypes.float.name))
+    return os.path.join(cache_dir, hashlib.sha1(key.encode()).hexdigest() + '.npy')
+
+
+def _save_atomically(path, array):
+    """Save `array` to `path` such that other processes never load a partially written file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    file_descriptor, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.npy.tmp')
+    try:
+        with os.fdopen(file_descriptor, 'wb') as tmp_file:
+            np.save(tmp_file, array)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def _load_npy_columns(path: str, columns: List[str]) -> List[np.ndarray]:
+    """Return the `columns` memory-mapped from a structured `.npy` file or a directory of `.npy` files."""
+    if os.path.isdir(path):
+        return [np.load(os.path.join(path, column + '.npy'), mmap_mode='r') for column in columns]
+    array = np.load(path, mmap_mode='r')
+    if array.dtype.names is None:
+        raise ValueError("The file {} does not contain a structured array with named columns.".format(path))
+    missing_columns = set(columns) - set(array.dtype.names)
+    if missing_columns:
+        raise ValueError("The columns {} are not in {}. Only the following are: {}".format(
+            missing_columns, path, array.dtype.names))
+    return [array[column] for column in columns]
+
+
+def _read_npy_rows(columns: List[np.ndarray], start: int, stop: int) -> np.ndarray:
+    """Copy the rows `start` to `stop` of the memory-mapped `columns` into an array (n_columns, n_rows)."""
+    start = int(start)
+    stop = min(int(stop), len(columns[0]))
+    chunk = np.empty(shape=(len(columns), stop - start), dtype=ztypes.float.as_numpy_dtype)
+    for row, column in zip(chunk, columns):
+        row[:] = column[start:stop]  # reads only these rows from the file
+    return chunk
+
+
 def _dense_var_to_tensor(var, dtype=None, name=None, as_ref=False):
     return var._dense_var_to_tensor(dtype=dtype, name=name, as_ref=as_ref)
 
@@ -12,7 +12,6 @@ from typing import Callable, Optional, Union, Type, Tuple
 import zfit
 from zfit import ztf
 from ..util import ztyping
-from ..util.exception import DueToLazynessNotImplementedError
 from .limits import convert_to_space, Space, supports
 from ..settings import ztypes
 
@@ -88,21 +87,22 @@ def mc_integrate(func: Callable, limits: ztyping.LimitsType, axes: Optional[ztyp
     n_samples = draws_per_dim ** n_axes
     if partial:
         n_vals = x.get_shape()[0].value
-        n_samples *= n_vals  # each entry wants it's mc
     else:
         n_vals = 1
 
-    if zfit.run.chunksize < n_samples:
-        n_chunks = int(np.ceil(n_samples / zfit.run.chunksize))
-        chunksize = int(np.ceil(n_samples / n_chunks))
-        avg = chunked_average(func=func, x=x, num_batches=n_chunks, batch_size=chunksize, space=limits,
-                              mc_sampler=mc_sampler)
+    if zfit.run.chunksize < n_samples * n_vals:
+        # each batch evaluates `n_vals` * `batch_size` points
+        batch_size = max(zfit.run.chunksize // n_vals, 1)
+        n_batches = int(np.ceil(n_samples / batch_size))
+        avg = chunked_average(func=func, x=x, num_batches=n_batches, batch_size=batch_size, space=limits,
+                              mc_sampler=mc_sampler, dtype=dtype)
 
     else:
         # TODO: deal with n_obs properly?
 
-        samples_normed = mc_sampler(dim=n_axes, num_results=n_samples, dtype=dtype)
-        samples_normed = tf.reshape(samples_normed, shape=(n_vals, int(n_samples / n_vals), n_axes))
+        # each entry its mc
+        samples_normed = mc_sampler(dim=n_axes, num_results=n_samples * n_vals, dtype=dtype)
+        samples_normed = tf.reshape(samples_normed, shape=(n_vals, n_samples, n_axes))
         samples = samples_normed * (upper - lower) + lower  # samples is [0, 1], stretch it
         samples = tf.transpose(samples, perm=[2, 0, 1])
 
@@ -133,77 +133,73 @@ def mc_integrate(func: Callable, limits: ztyping.LimitsType, axes: Optional[ztyp
     return ztf.to_real(integral, dtype=dtype)
 
 
-def chunked_average(func, x, num_batches, batch_size, space, mc_sampler):
-    lower, upper = space.limits
+def chunked_average(func: Callable, x: Optional[ztyping.XType], num_batches: int, batch_size: int,
+                    space: Space, mc_sampler: Callable, dtype: Type = ztypes.float) -> tf.Tensor:
+    """Average `func` over `num_batches` * `batch_size` MC samples in `space`, evaluating one batch at a time.
 
-    fake_resource_var = tf.get_variable("fake_hack_ResVar_for_custom_gradient",
-                                        initializer=ztf.constant(4242.))
-    fake_x = ztf.constant(42.) * fake_resource_var
-
-    @tf.custom_gradient
-    def dummy_func(fake_x):  # to make working with custom_gradient
-        if x is not None:
-            raise DueToLazynessNotImplementedError("partial not yet implemented")
-
-        def body(batch_num, mean):
-            if mc_sampler == tfp.mcmc.sample_halton_sequence:
-                start_idx = batch_num * batch_size
-                end_idx = start_idx + batch_size
-                indices = tf.range(start_idx, end_idx, dtype=tf.int32)
-                sample = mc_sampler(space.n_obs, sequence_indices=indices,
-                                    dtype=ztypes.float, randomized=False)
-            else:
-                sample = mc_sampler(shape=(batch_size, space.n_obs), dtype=ztypes.float)
-            sample = tf.guarantee_const(sample)
-            sample = (np.array(upper[0]) - np.array(lower[0])) * sample + lower[0]
-            sample = tf.transpose(sample)
-            sample = func(sample)
-            sample = tf.guarantee_const(sample)
-
-            batch_mean = tf.reduce_mean(sample)
-            batch_mean = tf.guarantee_const(batch_mean)
-            # with tf.control_dependencies([batch_mean]):
-            err_weight = 1 / tf.to_double(batch_num + 1)
-            # err_weight /= err_weight + 1
-            # print_op = tf.print(batch_mean)
-            print_op = tf.print(batch_num + 1, mean, err_weight * (batch_mean - mean))
-            with tf.control_dependencies([print_op]):
-                return batch_num + 1, mean + err_weight * (batch_mean - mean)
-            # return batch_num + 1, tf.guarantee_const(mean + err_weight * (batch_mean - mean))
-
-        cond = lambda batch_num, _: batch_num < num_batches
-
-        initial_mean = tf.convert_to_tensor(0, dtype=ztypes.float)
-        _, final_mean = tf.while_loop(cond, body, (0, initial_mean), parallel_iterations=1,
-                                      swap_memory=False, back_prop=False, maximum_iterations=num_batches)
-
-        def dummy_grad_with_var(dy, variables=None):
-            raise DueToLazynessNotImplementedError("Who called me? Mayou36")
-            if variables is None:
-                raise DueToLazynessNotImplementedError("Is this needed? Why? It's not a NN. Please make an issue.")
-
-            def dummy_grad_func(x):
-                values = func(x)
-                if variables:
-                    gradients = tf.gradients(values, variables, grad_ys=dy)
-                else:
-                    gradients = None
-                return gradients
+    The value as well as the gradient with respect to the parameters of `func` are accumulated batch-wise,
+    so the memory is bounded by the batch size.
+
+    Args:
+        func (callable): The function to average. For a partial average, it takes a list with one Tensor
+            of shape (n_vals, batch_size) per axis, otherwise a Tensor with shape (n_axes, batch_size).
+        x (numeric): If not None, the values (shape (n_vals, n_value_axes)) of the axes that are not
+            averaged over. The average is returned for each value.
+        num_batches (int): Number of batches.
+        batch_size (int): Number of samples per batch.
+        space (`Space`): The limits to draw the samples from.
+        mc_sampler (callable): Takes `dim`, `num_results` and `dtype` and returns values between 0 and 1.
+            If it is `sample_halton_sequence`, the sequence is continued over the batches.
+        dtype (dtype):
+
+    Returns:
+        tf.Tensor: The average, a scalar or with shape (n_vals,) if x is given.
+    """
+    lower, upper = space.limits
+    lower = ztf.convert_to_tensor(lower[0], dtype=dtype)
+    upper = ztf.convert_to_tensor(upper[0], dtype=dtype)
+    axes = space.axes
+    n_axes = space.n_obs
+    partial = x is not None
 
-            return chunked_average(func=dummy_grad_func, x=x, num_batches=num_batches, batch_size=batch_size,
-                                   space=space, mc_sampler=mc_sampler)
+    if partial:
+        x = ztf.convert_to_tensor(x, dtype=dtype)
+        if len(x.shape) == 1:
+            x = tf.expand_dims(x, axis=1)
+        n_vals = tf.shape(x)[0]
+        initial_value = tf.zeros(shape=(n_vals,), dtype=dtype)
+    else:
+        initial_value = ztf.constant(0., dtype=dtype)
 
-        def dummy_grad_without_var(dy):
-            return dummy_grad_with_var(dy=dy, variables=None)
+    def batch_sum(batch_num):
+        if mc_sampler == tfp.mcmc.sample_halton_sequence:
+            start_idx = batch_num * batch_size
+            indices = tf.range(start_idx, start_idx + batch_size, dtype=tf.int32)
+            sample = mc_sampler(n_axes, sequence_indices=indices, dtype=dtype, randomized=False)
+        else:
+            sample = mc_sampler(dim=n_axes, num_results=batch_size, dtype=dtype)
+        sample = sample * (upper - lower) + lower  # sample is [0, 1], stretch it
 
-        print_op = tf.print(final_mean)
-        with tf.control_dependencies([print_op]):
-            return tf.guarantee_const(final_mean), dummy_grad_with_var
+        if partial:
+            value_list = []
+            index_samples = 0
+            index_values = 0
+            for i in range(n_axes + x.shape[1].value):
+                if i in axes:
+                    value_list.append(tf.tile(tf.expand_dims(sample[:, index_samples], axis=0),
+                                              multiples=(n_vals, 1)))
+                    index_samples += 1
+                else:
+                    value_list.append(tf.tile(tf.expand_dims(x[:, index_values], axis=1),
+                                              multiples=(1, batch_size)))
+                    index_values += 1
+            return tf.reduce_sum(func(value_list), axis=1)
+        else:
+            return tf.reduce_sum(func(tf.transpose(sample)))
 
-    try:
-        return dummy_func(fake_x)
-    except TypeError:
-        return dummy_func(fake_x)
+    total = ztf.chunked_sum(func=batch_sum, n_chunks=num_batches, initial_value=initial_value,
+                            name="chunked_average")
+    return total / (num_batches * batch_size)
 
 
 class AnalyticIntegral:
@@ -211,6 +207,8 @@ class AnalyticIntegral:
         """Hold analytic integrals and manage their dimensions, limits etc."""
         super(AnalyticIntegral, self).__init__(*args, **kwargs)
         self._integrals = collections.defaultdict(dict)
+        self._axes_by_size = []  # the keys of `_integrals`, biggest first
+        self._lookup_cache = {}
 
     def get_max_axes(self, limits: ztyping.LimitsType, axes: ztyping.AxesTypeInput = None) -> Tuple[int]:
         """Return the maximal available axes to integrate over analytically for given limits
@@ -228,21 +226,33 @@ class AnalyticIntegral:
 
         return self._get_max_axes_limits(limits, out_of_axes=limits.axes)[0]  # only axes
 
-    def _get_max_axes_limits(self, limits, out_of_axes):  # TODO: automatic caching? but most probably not relevant
-        if out_of_axes:
-            out_of_axes = frozenset(out_of_axes)
-            implemented_axes = frozenset(d for d in self._integrals.keys() if d <= out_of_axes)
-        else:
-            implemented_axes = set(self._integrals.keys())
-        implemented_axes = sorted(implemented_axes, key=len, reverse=True)  # iter through biggest first
-        for axes in implemented_axes:
+    def _get_max_axes_limits(self, limits, out_of_axes):
+        """Return the biggest axes with integrals over `limits` and the limits of these integrals.
+
+        The lookups are memoized by the values of `limits` and `out_of_axes` until the next `register`.
+        """
+        out_of_axes = frozenset(out_of_axes) if out_of_axes else None
+        cache_key = (limits.obs, limits.axes, limits.limits, out_of_axes)
+        try:
+            axes_limits = self._lookup_cache.get(cache_key)
+        except TypeError:  # unhashable limits, e.g. Tensors
+            return self._find_max_axes_limits(limits=limits, out_of_axes=out_of_axes)
+        if axes_limits is None:
+            axes_limits = self._find_max_axes_limits(limits=limits, out_of_axes=out_of_axes)
+            self._lookup_cache[cache_key] = axes_limits
+        return axes_limits
+
+    def _find_max_axes_limits(self, limits, out_of_axes):
+        for axes in self._axes_by_size:  # iter through biggest first
+            if out_of_axes is not None and not axes <= out_of_axes:
+                continue
             limits_matched = []
             for lim, integ in self._integrals[axes].items():
                 if integ.limits >= limits:
                     limits_matched.append(lim)
 
             if limits_matched:  # one or more integrals available
-                return tuple(sorted(axes)), limits_matched
+                return tuple(sorted(axes)), tuple(limits_matched)
         return (), ()  # no integral available for this axes
 
     def get_max_integral(self, limits: ztyping.LimitsType,
@@ -295,8 +305,9 @@ class AnalyticIntegral:
         func = supports(norm_range=supports_norm_range, multiple_limits=supports_multiple_limits)(func)
         limits = limits.with_axes(axes=tuple(sorted(limits.axes)))
         self._integrals[axes][limits.limits] = Integral(func=func, limits=limits,
-                                                        priority=priority)  # TODO improve with
-        # database-like access
+                                                        priority=priority)
+        self._axes_by_size = sorted(self._integrals.keys(), key=len, reverse=True)
+        self._lookup_cache.clear()
 
     def integrate(self, x: Optional[ztyping.XType], limits: ztyping.LimitsType, axes: ztyping.AxesTypeInput = None,
                   norm_range: ztyping.LimitsType = None, params: dict = None) -> ztyping.XType:
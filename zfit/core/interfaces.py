@@ -58,6 +58,12 @@ class ZfitData(ZfitDimensional):
     def value(self, obs: List[str] = None) -> ztyping.XType:
         raise NotImplementedError
 
+    @property
+    @abc.abstractmethod
+    def weights(self):
+        """Return the weights of the events or None if the events are not weighted."""
+        raise NotImplementedError
+
 
 class ZfitSpace(ZfitObject):
 
@@ -1,13 +1,20 @@
 import abc
 
+import numpy as np
 import tensorflow as tf
 from typing import Optional, Union
 
+import zfit
 from zfit import ztf
+from ..util import ztyping
+from ..util.cache import _create_cache_variable, cache_value_by_params
 from .baseobject import BaseObject, BaseDependentsMixin
-from .interfaces import ZfitLoss
+from .data import Data
+from .interfaces import ZfitData, ZfitLoss
+from .limits import Space
 from ..models.functions import SimpleFunc
 from ..util.container import convert_to_container, is_container
+from ..util.graph import in_control_flow_or_dependencies
 from ..util.exception import IntentionNotUnambiguousError, NotExtendedPDFError
 from zfit.settings import ztypes
 
@@ -15,6 +22,13 @@ from zfit.settings import ztypes
 def _unbinned_nll_tf(model, data, fit_range) -> tf.Tensor:
     """Return unbinned negative log likelihood graph for a PDF
 
+    If chunking is activated (`zfit.run.chunking.active`), the data is split into chunks of
+    `zfit.run.chunking.max_n_points` events and the log-likelihood as well as its gradient are
+    accumulated chunk by chunk, bounding the peak memory by the chunk size. Data that is streamed
+    (e.g. `Data.from_npy`) reads only the rows of the current chunk.
+
+    If the data has weights, the log-likelihood of every event is multiplied by its weight.
+
     Args:
         fit_range ():
         model (Tensor): The probabilities
@@ -32,24 +46,159 @@ def _unbinned_nll_tf(model, data, fit_range) -> tf.Tensor:
         nlls = [_unbinned_nll_tf(model=p, data=d, fit_range=r)
                 for p, d, r in zip(model, data, fit_range)]
         nll_finished = tf.reduce_sum(nlls)
-    else:  # TODO: complicated limits?
+    else:
         fit_range = model.convert_sort_space(fit_range)
-        limits = fit_range.limits
-        assert len(limits[0]) == 1, "multiple limits not (yet) supported in nll."
-        (lower,), (upper,) = limits
-
-        # TODO(Mayou36): implement properly data cutting
-        # in_limits = tf.logical_and(lower <= data, data <= upper)
-        # data = tf.boolean_mask(tensor=data, mask=in_limits)
-        probs = model.pdf(data, norm_range=fit_range)
-        if model.is_extended:
-            probs /= model.get_yield()
-        log_probs = tf.log(probs)
-        nll = -tf.reduce_sum(log_probs)
+        if isinstance(data, ZfitData):  # the view is cached: nothing is added if the loss already did it
+            data = data.filter_range(fit_range)
+
+        weights = _get_weights(data)
+
+        def log_likelihood(x, weights=None):
+            probs = model.pdf(x, norm_range=fit_range)
+            if model.is_extended:
+                probs /= model.get_yield()
+            log_probs = tf.log(probs)
+            if weights is not None:
+                log_probs *= weights
+            return tf.reduce_sum(log_probs)
+
+        if zfit.run.chunking.active:
+            if not isinstance(data, Data):  # the events are given with the obs of the model
+                x = model._add_dim_to_x(ztf.convert_to_tensor(data))
+                data = Data.from_tensors(obs=model.obs, tensors=x)
+            chunksize = int(zfit.run.chunksize)
+
+            def chunk_log_likelihood(chunk_num):
+                start = chunk_num * chunksize
+                x, chunk_weights = data.chunk(start, start + chunksize, obs=model.obs)
+                return log_likelihood(x, weights=chunk_weights)
+
+            nll = -ztf.chunked_sum(func=chunk_log_likelihood, n_chunks=data.n_chunks(chunksize),
+                                   initial_value=ztf.constant(0.))
+        else:
+            nll = -log_likelihood(data, weights=weights)
         nll_finished = nll
     return nll_finished
 
 
+def _get_weights(data):
+    """Return the weights of `data` or None if it is not a weighted `Data`."""
+    return data.weights if isinstance(data, ZfitData) else None
+
+
+def _n_events(data):
+    """Return the (weighted) number of events in `data`."""
+    weights = _get_weights(data)
+    if weights is not None:
+        return tf.reduce_sum(weights)
+    return tf.size(data, out_type=ztypes.float)
+
+
+def _convert_to_data(data, fit_range):
+    """Wrap array-like `data` of a model with the `fit_range` into a `Data` with the observables of the range.
+
+    Raises:
+        TypeError: if `data` is neither a `ZfitData` nor a Tensor, a Variable, a numpy array or a list.
+    """
+    if isinstance(data, ZfitData) or not isinstance(fit_range, Space):  # e.g. a `SimpleLoss` without data
+        return data
+    if not isinstance(data, (tf.Tensor, tf.Variable, np.ndarray, list)):
+        raise TypeError("`data` has to be a `ZfitData`, a Tensor, a Variable, a numpy array or a list, not "
+                        "{}".format(type(data)))
+    return Data.from_tensors(obs=fit_range.obs, tensors=ztf.convert_to_tensor(data, dtype=ztypes.float))
+
+
+def _bin_integrals(model, edges, n_points_per_bin=5):
+    """Return the unnormalized integrals of `model` over the bins, analytic if possible.
+
+    Models wrapping a distribution are integrated with its cdf evaluated once at all the `edges`. Other
+    models with an analytic integral are integrated bin by bin, as the integral takes the limits of every
+    bin as a `Space`. The rest is integrated numerically with a Gauss-Legendre quadrature in every bin,
+    with one evaluation of the pdf at the points of all bins.
+    """
+    from ..models.dist_tfp import WrapDistribution
+
+    if isinstance(model, WrapDistribution):
+        cdf = model.distribution.cdf(ztf.convert_to_tensor(edges, dtype=model.dtype))
+        return cdf[1:] - cdf[:-1]
+    bins = list(zip(edges[:-1], edges[1:]))
+    try:
+        integrals = [model.analytic_integrate(limits=model.convert_sort_space(limits=bin_limits),
+                                              norm_range=False)
+                     for bin_limits in bins]
+    except NotImplementedError:
+        points, weights = np.polynomial.legendre.leggauss(n_points_per_bin)
+        half_widths = (edges[1:] - edges[:-1]) / 2
+        centers = (edges[1:] + edges[:-1]) / 2
+        x = (centers[:, None] + half_widths[:, None] * points[None, :]).ravel()
+        values = model.pdf(ztf.convert_to_tensor(x), norm_range=False)
+        values = tf.reshape(values, shape=(len(bins), n_points_per_bin))
+        return tf.reduce_sum(values * weights, axis=1) * half_widths
+    return tf.reshape(tf.stack(integrals), shape=(-1,))
+
+
+def _binned_nll_tf(model, data, fit_range, n_bins, extended=False) -> tf.Tensor:
+    """Return the binned negative log likelihood graph for a PDF.
+
+    The data is histogrammed once into `n_bins` equally sized bins within the `fit_range` (the counts are
+    stored in a variable when the graph is built), so that evaluating the likelihood scales with the
+    number of bins and not with the number of events. The expected fraction of events in each bin is
+    the integral of the model over the bin (analytic if available, numeric otherwise) divided by the sum
+    of all bin integrals.
+
+    Args:
+        model (ZfitPDF): The PDF, only one observable is supported.
+        data (Data): The data to histogram.
+        fit_range (Space): The range to bin, a single interval.
+        n_bins (int): The number of bins.
+        extended (bool): If True, the expected number of events in a bin is the yield of `model` times
+            the expected fraction, which are compared with a Poisson likelihood. Otherwise the counts are
+            compared to the fractions with a multinomial likelihood.
+
+    Returns:
+        graph: the binned nll
+    """
+    if is_container(model):
+        nlls = [_binned_nll_tf(model=p, data=d, fit_range=r, n_bins=n_bins, extended=extended)
+                for p, d, r in zip(model, data, fit_range)]
+        return tf.reduce_sum(nlls)
+
+    fit_range = model.convert_sort_space(fit_range)
+    limits = fit_range.limits
+    if fit_range.n_obs != 1 or len(limits[0]) != 1:
+        raise NotImplementedError("Binned likelihoods support only one observable and a single range.")
+    ((lower,),), ((upper,),) = limits
+    weights = _get_weights(data)
+    with model._convert_sort_x(data) as data:
+        x = data.value()[0]
+    if weights is None:
+        weights = tf.ones_like(x)
+    in_range = tf.logical_and(lower <= x, x <= upper)
+    x = tf.boolean_mask(x, mask=in_range)
+    weights = tf.boolean_mask(weights, mask=in_range)
+    bin_indices = tf.to_int32(tf.floor((x - lower) / (upper - lower) * n_bins))
+    bin_indices = tf.minimum(bin_indices, n_bins - 1)  # the upper edge belongs to the last bin
+    counts = tf.unsorted_segment_sum(weights, segment_ids=bin_indices, num_segments=n_bins)
+    counts = _create_cache_variable(initial_value=counts, dtype=ztypes.float, name="bin_counts")
+    counts = counts.read_value()
+
+    bin_integrals = _bin_integrals(model=model, edges=np.linspace(lower, upper, n_bins + 1))
+    fractions = bin_integrals / tf.reduce_sum(bin_integrals)
+
+    def safe_log(values):  # empty bins do not contribute, avoid 0 * log(0)
+        return tf.log(tf.where(counts > 0, values, tf.ones_like(values)))
+
+    if extended:
+        if not model.is_extended:
+            raise NotExtendedPDFError("The pdf {} is not extended but has to be (for an extended "
+                                      "fit)".format(model))
+        expected = model.get_yield() * fractions
+        nll = -tf.reduce_sum(counts * safe_log(expected) - expected)
+    else:
+        nll = -tf.reduce_sum(counts * safe_log(fractions))
+    return nll
+
+
 def _nll_constraints_tf(constraints):
     if not constraints:
         return ztf.constant(0.)  # adding 0 to nll
@@ -62,6 +211,7 @@ def _nll_constraints_tf(constraints):
 
 
 class BaseLoss(BaseObject, BaseDependentsMixin, ZfitLoss):
+    _DEFAULT_cache_components = False
 
     def __init__(self, model, data, fit_range=None, constraints=None):
         super().__init__(name=type(self).__name__)
@@ -72,6 +222,9 @@ class BaseLoss(BaseObject, BaseDependentsMixin, ZfitLoss):
         if constraints is None:
             constraints = []
         self._constraints = convert_to_container(constraints, list)
+        self._loss_evals = {}
+        # if True, the term of a model is only recomputed if its parameters changed, see `_components_value`
+        self.cache_components = self._DEFAULT_cache_components
 
     def __init_subclass__(cls, **kwargs):
         cls._name = "UnnamedSubBaseLoss"
@@ -119,7 +272,11 @@ class BaseLoss(BaseObject, BaseDependentsMixin, ZfitLoss):
 
         # sanitize fit_range
         fit_range = [p.convert_sort_space(limits=range_) for p, range_ in zip(pdf, fit_range)]
-        # TODO: sanitize pdf, data?
+        # TODO: sanitize pdf?
+        # cut the data to the fit_range once, only the events inside are evaluated by the loss
+        data = [_convert_to_data(data=d, fit_range=range_) for d, range_ in zip(data, fit_range)]
+        data = [d.filter_range(range_) if isinstance(d, ZfitData) and isinstance(range_, Space) else d
+                for d, range_ in zip(data, fit_range)]
 
         return pdf, data, fit_range
 
@@ -156,6 +313,22 @@ class BaseLoss(BaseObject, BaseDependentsMixin, ZfitLoss):
         pdf_dependents = self._extract_dependents(self.model)
         return pdf_dependents
 
+    def get_components(self) -> list:
+        """Split a simultaneous loss into one loss per (model, data, fit_range), their sum is this loss.
+
+        The constraints are added to the first component.
+
+        Returns:
+            list(BaseLoss):
+        """
+        components = [self._create_similar(model=[model], data=[data], fit_range=[fit_range])
+                      for model, data, fit_range in zip(self.model, self.data, self.fit_range)]
+        for component in components:
+            component.cache_components = self.cache_components
+        if self.constraints:
+            components[0].add_constraints(constraints=list(self.constraints))
+        return components
+
     @abc.abstractmethod
     def _loss_func(self, model, data, fit_range, constraints):
         raise NotImplementedError
@@ -165,11 +338,57 @@ class BaseLoss(BaseObject, BaseDependentsMixin, ZfitLoss):
 
     def _value(self):
         try:
+            if self.cache_components:
+                return self._components_value()
             return self._loss_func(model=self.model, data=self.data, fit_range=self.fit_range,
                                    constraints=self.constraints)
         except NotImplementedError:
             raise NotImplementedError("_loss_func not properly defined!")
 
+    def _components_value(self):
+        """Sum the terms of every (model, data, fit_range), each recomputed only if its parameters changed.
+
+        The value and gradient of every term are cached together with the values of the parameters of its
+        model, so a step in the parameters of one model (e.g. a numerical derivative or a simultaneous fit
+        with mostly disjoint parameters) only recomputes the terms of the models that depend on them. The
+        data must not change between evaluations. The constraints are always evaluated.
+        """
+        values = []
+        for model, data, fit_range in zip(self.model, self.data, self.fit_range):
+            def component_value(model=model, data=data, fit_range=fit_range):
+                return self._loss_func(model=[model], data=[data], fit_range=[fit_range], constraints=[])
+
+            values.append(cache_value_by_params(func=component_value, params=self._extract_dependents(model),
+                                                name="cache_loss_component"))
+        if self.constraints:
+            values.append(ztf.reduce_sum(self.constraints))
+        return tf.add_n(values)
+
+    def value_batch(self, params: ztyping.ParamsTypeOpt, values, gradient: bool = False):
+        """Evaluate the loss (and the gradient) at a batch of points, e.g. for a scan.
+
+        The graph to evaluate the loss at a point is built only once per set of `params` and reused by
+        every call. Each point is evaluated with one session run.
+
+        Args:
+            params (list(`zfit.Parameter`)): The parameters that change between the points.
+            values (numpy.ndarray): The points with shape (n_points, n_params) with the values in the same
+                order as `params`.
+            gradient (bool): If True, evaluate the gradient with respect to `params` as well.
+
+        Returns:
+            numpy.ndarray or tuple(numpy.ndarray, numpy.ndarray): The values of the loss with shape
+                (n_points,) and, if `gradient` is True, the gradients with shape (n_points, n_params).
+        """
+        from ..minimizers.evaluator import LossEval
+
+        params = tuple(convert_to_container(params, container=list))
+        loss_eval = self._loss_evals.get(params)
+        if loss_eval is None:
+            loss_eval = LossEval(loss=self, params=params)
+            self._loss_evals[params] = loss_eval
+        return loss_eval.value_batch(values=values, gradient=gradient)
+
     def __add__(self, other):
         if not isinstance(other, BaseLoss):
             raise TypeError("Has to be a subclass of `BaseLoss` or overwrite `__add__`.")
@@ -178,10 +397,15 @@ class BaseLoss(BaseObject, BaseDependentsMixin, ZfitLoss):
         model = self.model + other.model
         data = self.data + other.data
         fit_range = self.fit_range + other.fit_range
-        loss = type(self)(model=model, data=data, fit_range=fit_range, constraints=self.constraints)
+        loss = self._create_similar(model=model, data=data, fit_range=fit_range, constraints=self.constraints)
         loss.add_constraints(constraints=other.constraints)
+        loss.cache_components = self.cache_components and other.cache_components
         return loss
 
+    def _create_similar(self, model, data, fit_range, constraints=None):
+        """Create a loss of the same type and with the same settings for other components."""
+        return type(self)(model=model, data=data, fit_range=fit_range, constraints=constraints)
+
 
 class CachedLoss(BaseLoss):
 
@@ -194,6 +418,8 @@ class CachedLoss(BaseLoss):
         raise NotImplementedError
 
     def _value(self):
+        if in_control_flow_or_dependencies():  # the cached loss can't be used with other dependencies
+            return super()._value()
         if self._cached_loss is None:
             loss = super()._value()
             self._cached_loss = loss
@@ -232,11 +458,57 @@ class ExtendedUnbinnedNLL(UnbinnedNLL):
         for mod, dat in zip(model, data):
             if not mod.is_extended:
                 raise NotExtendedPDFError("The pdf {} is not extended but has to be (for an extended fit)".format(mod))
-            poisson_terms.append(-mod.get_yield() + tf.size(dat, out_type=ztypes.float) * tf.log(mod.get_yield()))
+            poisson_terms.append(-mod.get_yield() + _n_events(dat) * tf.log(mod.get_yield()))
         nll -= tf.reduce_sum(poisson_terms)
         return nll
 
 
+class BinnedNLL(CachedLoss):
+    _name = "BinnedNLL"
+    _extended = False
+
+    def __init__(self, model, data, fit_range=None, constraints=None, n_bins: int = 50):
+        """Binned negative log likelihood: the data is histogrammed once, the model integrated over the bins.
+
+        Args:
+            model (ZfitPDF or list(ZfitPDF)): The PDF(s), with one observable each.
+            data (Data or list(Data)): The data, histogrammed when the loss is built.
+            fit_range (Space or list(Space)): The range that is binned.
+            constraints ():
+            n_bins (int): The number of equally sized bins of every component.
+        """
+        self._n_bins = n_bins
+        super().__init__(model=model, data=data, fit_range=fit_range, constraints=constraints)
+
+    @property
+    def n_bins(self):
+        return self._n_bins
+
+    def _create_similar(self, model, data, fit_range, constraints=None):
+        return type(self)(model=model, data=data, fit_range=fit_range, constraints=constraints,
+                          n_bins=self.n_bins)
+
+    def _loss_func(self, model, data, fit_range, constraints):
+        nll = _binned_nll_tf(model=model, data=data, fit_range=fit_range, n_bins=self.n_bins,
+                             extended=self._extended)
+        if constraints:
+            constraints = ztf.reduce_sum(constraints)
+            nll += constraints
+        return nll
+
+    def _cache_add_constraints(self, constraints):
+        if self._cached_loss is not None:
+            self._cached_loss += ztf.reduce_sum(constraints)
+
+    def errordef(self, sigma: Union[float, int]) -> Union[float, int]:
+        return sigma
+
+
+class ExtendedBinnedNLL(BinnedNLL):
+    _name = "ExtendedBinnedNLL"
+    _extended = True
+
+
 class SimpleLoss(BaseLoss):
     _name = "SimpleLoss"
 
@@ -249,6 +521,9 @@ class SimpleLoss(BaseLoss):
     def errordef(self, func):
         raise NotImplementedError("For this simple loss function, no error calculation is possible.")
 
+    def get_components(self):
+        return [self]
+
     def _loss_func(self, model, data, fit_range, constraints=None):
         loss = self._simple_func
         return loss()
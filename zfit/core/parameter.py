@@ -16,6 +16,7 @@ from tensorflow.python.ops.resource_variable_ops import ResourceVariable
 from zfit.core.interfaces import ZfitModel, ZfitParameter
 from ..util.graph import get_dependents
 from ..util.exception import LogicalUndefinedOperationError
+from ..util.temporary import TemporarilySet
 from . import baseobject as zbaseobject
 from . import interfaces as zinterfaces
 from ..settings import ztypes
@@ -387,6 +388,21 @@ class Parameter(ZfitParameterMixin, TFBaseVariable, BaseParameter):
     def step_size(self, value):
         self._step_size = value
 
+    def set_step_size(self, value):
+        """Set the step size (temporarily if used with contextmanager).
+
+        Args:
+            value (float): The new step size.
+        """
+
+        def setter(step_size):
+            self._step_size = step_size
+
+        def getter():
+            return self._step_size
+
+        return TemporarilySet(value=value, setter=setter, getter=getter)
+
     # TODO: make it a random variable? return tensor that evaluates new all the time?
     def randomize(self, sess, minval=None, maxval=None):
         """Update the value with a randomised value between minval and maxval.
@@ -13,9 +13,18 @@ from ..settings import ztypes
 @no_multiple_limits
 def accept_reject_sample(prob: typing.Callable, n: int, limits: Space,
                          sampler: typing.Callable = tf.random_uniform,
-                         dtype=ztypes.float, prob_max: typing.Union[None, int] = None) -> tf.Tensor:
+                         dtype=ztypes.float, prob_max: typing.Union[None, int] = None,
+                         max_batch_size: typing.Union[None, int] = None,
+                         safety_factor: float = 1.1, n_prob_max_estimate: int = 10000) -> tf.Tensor:
     """Accept reject sample from a probability distribution.
 
+    The candidates are drawn in batches of at most `max_batch_size` points and the accepted ones are
+    written into a `tf.TensorArray`, so that memory is bounded by the batch size and no sample is copied
+    more than once. All batches use the same majorant `prob_max`. If a batch contains a probability
+    above the majorant, the majorant is raised to `safety_factor` times the probability found and the
+    sample is restarted, since the points accepted so far are biased towards the region where the
+    majorant was too small.
+
     Args:
         prob (function): A function taking x a Tensor as an argument and returning the probability
             (or anything that is proportional to the probability).
@@ -25,67 +34,81 @@ def accept_reject_sample(prob: typing.Callable, n: int, limits: Space,
             0 and 1
         dtype ():
         prob_max (Union[None, int]): The maximum of the model function for the given limits. If None
-            is given, it will be automatically, safely estimated (by a 10% increase in computation time
-            (constant weak scaling)).
+            is given, it will be estimated once from `n_prob_max_estimate` uniformly drawn points and
+            increased by `safety_factor`.
+        max_batch_size (Union[None, int]): The maximum number of candidates drawn and evaluated at once.
+            If None, `zfit.run.chunksize` is used, capped at 500000.
+        safety_factor (float): Factor to multiply an estimated maximum with to obtain the majorant.
+        n_prob_max_estimate (int): Number of points used to estimate `prob_max` if it is not given.
 
     Returns:
         tf.Tensor:
     """
     n_dims = limits.n_obs
     lower, upper = limits.limits
-    lower = ztf.convert_to_tensor(lower[0], dtype=dtype)
-    upper = ztf.convert_to_tensor(upper[0], dtype=dtype)
+    lower = tf.expand_dims(ztf.convert_to_tensor(lower[0], dtype=dtype), axis=1)
+    upper = tf.expand_dims(ztf.convert_to_tensor(upper[0], dtype=dtype), axis=1)
     n = tf.to_int64(n)
-
-    def enough_produced(n, sample, n_total_drawn, eff):
-        return tf.greater(n, tf.shape(sample, out_type=tf.int64)[1])
-
-    def sample_body(n, sample, n_total_drawn=0, eff=1.):
-        if sample is None:
-            n_to_produce = n
-        else:
-            n_to_produce = n - tf.shape(sample, out_type=tf.int64)[1]
-        n_to_produce = tf.to_int64(ztf.to_real(n_to_produce) / eff * 1.01) + 100  # just to make sure
-        # TODO: adjustable efficiency cap for memory efficiency (prevent too many samples at once produced)
-        n_to_produce = tf.minimum(n_to_produce, tf.to_int64(5e5))  # introduce a cap to force serial
-        n_total_drawn += n_to_produce
-        n_total_drawn = tf.to_int64(n_total_drawn)
-
-        sample_drawn = sampler(shape=(n_dims + 1, n_to_produce),  # + 1 dim for the function value
-                               dtype=ztypes.float)
-        # HACK n dims?
-
-        rnd_sample = tf.transpose(sample_drawn[:-1, :]) * (upper - lower) + lower
-        rnd_sample = tf.transpose(rnd_sample)
-        # HACK END
-
-        probabilities = prob(rnd_sample)
-        if prob_max is None:
-            prob_max_inferred = tf.reduce_max(probabilities)
-        else:
-            prob_max_inferred = prob_max
-        random_thresholds = sample_drawn[-1, :] * prob_max_inferred
-        take_or_not = probabilities > random_thresholds
-        # rnd_sample = tf.expand_dims(rnd_sample, dim=0) if len(rnd_sample.shape) == 1 else rnd_sample
-        take_or_not = take_or_not[0] if len(take_or_not.shape) == 2 else take_or_not
+    if max_batch_size is None:
+        max_batch_size = min(zfit.run.chunksize, int(5e5))
+    max_batch_size = tf.to_int64(max_batch_size)
+
+    def draw(n_to_draw):
+        sample_drawn = sampler(shape=(n_dims + 1, n_to_draw),  # + 1 dim for the random threshold
+                               dtype=dtype)
+        rnd_sample = sample_drawn[:-1, :] * (upper - lower) + lower
+        probabilities = tf.reshape(prob(rnd_sample), shape=(-1,))
+        return rnd_sample, probabilities, sample_drawn[-1, :]
+
+    if prob_max is None:
+        _, probabilities, _ = draw(n_to_draw=tf.minimum(tf.to_int64(n_prob_max_estimate), max_batch_size))
+        prob_max = tf.reduce_max(probabilities) * safety_factor
+        eff = tf.reduce_mean(probabilities) / prob_max  # estimate of the fraction of accepted points
+    else:
+        prob_max = ztf.convert_to_tensor(prob_max, dtype=dtype)
+        eff = ztf.constant(1.)
+
+    def enough_produced(i, sample_array, n_produced, n_drawn, n_rows_written, n_rows_discarded, prob_max,
+                        eff):
+        return tf.greater(n, n_produced)
+
+    def sample_body(i, sample_array, n_produced, n_drawn, n_rows_written, n_rows_discarded, prob_max, eff):
+        n_to_produce = n - n_produced
+        n_to_draw = tf.to_int64(ztf.to_real(n_to_produce) / eff * 1.01) + 100  # just to make sure
+        n_to_draw = tf.minimum(n_to_draw, max_batch_size)  # bounds the memory, forces serial batches
+
+        rnd_sample, probabilities, random_thresholds = draw(n_to_draw=n_to_draw)
+
+        # the majorant was too small: raise it and restart, the points accepted so far are biased
+        prob_max_exceeded = tf.greater(tf.reduce_max(probabilities), prob_max)
+        prob_max = tf.where(prob_max_exceeded, tf.reduce_max(probabilities) * safety_factor, prob_max)
+        n_rows_discarded = tf.where(prob_max_exceeded, n_rows_written, n_rows_discarded)
+        n_produced = tf.where(prob_max_exceeded, tf.zeros_like(n_produced), n_produced)
+        n_drawn = tf.where(prob_max_exceeded, tf.zeros_like(n_drawn), n_drawn)
+
+        take_or_not = probabilities > random_thresholds * prob_max
         filtered_sample = tf.boolean_mask(rnd_sample, mask=take_or_not, axis=1)
-
-        if sample is None:
-            sample = filtered_sample
-        else:
-            sample = tf.concat([sample, filtered_sample], axis=1)
-
-        # efficiency (estimate) of how many samples we get
-        eff = ztf.to_real(tf.shape(sample, out_type=tf.int64)[1]) / ztf.to_real(n_total_drawn)
-        return n, sample, n_total_drawn, eff
-
-    sample = tf.while_loop(cond=enough_produced, body=sample_body,  # paraopt
-                           loop_vars=sample_body(n=n, sample=None,  # run first once for initialization
-                                                 n_total_drawn=0, eff=1.),
-                           swap_memory=True,
-                           parallel_iterations=4,
-                           back_prop=False)[1]  # backprop not needed here
-    return sample[:, :n]  # cutting away to many produced
+        n_filtered = tf.shape(filtered_sample, out_type=tf.int64)[1]
+        sample_array = sample_array.write(i, tf.transpose(filtered_sample))
+
+        n_produced += n_filtered
+        n_drawn += n_to_draw
+        n_rows_written += n_filtered
+        # efficiency (estimate) of how many samples we get, bounded to not draw the maximum forever
+        eff = tf.maximum(ztf.to_real(n_produced) / ztf.to_real(n_drawn), 1e-6)
+        return i + 1, sample_array, n_produced, n_drawn, n_rows_written, n_rows_discarded, prob_max, eff
+
+    sample_array = tf.TensorArray(dtype=dtype, size=0, dynamic_size=True, infer_shape=False,
+                                  element_shape=tf.TensorShape((None, n_dims)))
+    zero = tf.constant(0, dtype=tf.int64)
+    loop_vars = (tf.constant(0), sample_array, zero, zero, zero, zero, prob_max, eff)
+    _, sample_array, _, _, _, n_rows_discarded, _, _ = tf.while_loop(cond=enough_produced, body=sample_body,
+                                                                     loop_vars=loop_vars,
+                                                                     swap_memory=True,
+                                                                     parallel_iterations=1,
+                                                                     back_prop=False)  # not needed here
+    sample = sample_array.concat()[n_rows_discarded:n_rows_discarded + n]  # cut away too many produced
+    return tf.transpose(sample)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,193 @@
+"""Toy studies: generate a sample from a model, fit it and collect the results, many times."""
+from collections import OrderedDict
+import contextlib
+import multiprocessing
+from typing import Callable, Union
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.python.ops.resource_variable_ops import ResourceVariable
+
+import zfit
+from .interfaces import ZfitPDF
+from .loss import ExtendedUnbinnedNLL, UnbinnedNLL
+from ..minimizers.interface import ZfitMinimizer
+from ..settings import ztypes
+from ..util import ztyping
+from ..util.execution import SessionHolderMixin, split_cpu
+
+
+class ToyStudy(SessionHolderMixin):
+
+    def __init__(self, model: ZfitPDF, n_events: int, limits: ztyping.LimitsType = None,
+                 params: ztyping.ParamsTypeOpt = None, minimizer: ZfitMinimizer = None,
+                 compute_errors: bool = True, hesse_method: Union[str, Callable] = None,
+                 sess: tf.Session = None):
+        """Generate toy samples from `model` and fit the model back to them.
+
+        The graph is built only once: the sample is generated into a variable that holds the data of
+        the loss, so every toy regenerates the data in place and reuses the same loss (and minimizer).
+        Before every toy, `params` are set back to the values they have when the study is created: the
+        sample is generated with these values and the fit starts from them.
+
+        Args:
+            model (ZfitPDF): The model to generate the toys from and to fit.
+            n_events (int): Number of events per toy.
+            limits (Space): The range to generate and fit in. If None, the `norm_range` of `model`.
+            params (list(`zfit.Parameter`)): The parameters to fit. If None, all floating parameters of
+                `model`.
+            minimizer (ZfitMinimizer): The minimizer to fit with. If None, a `MinuitMinimizer` is used.
+            compute_errors (bool): If True, the Hessian error of every parameter is calculated as well.
+            hesse_method (str or callable): The method of :py:meth:`FitResult.hesse` to calculate the errors
+                with. If None, 'minuit_hesse' for a `MinuitMinimizer` and 'autodiff_hesse' otherwise.
+            sess (tf.Session): The session to run the study in. If None, the default zfit session is used.
+        """
+        super().__init__()
+        if limits is None:
+            limits = model.norm_range
+        limits = model.convert_sort_space(limits=limits)
+        if params is None:
+            params = model.get_dependents(only_floating=True)
+        from ..minimizers.minimizer_minuit import MinuitMinimizer
+        if minimizer is None:
+            minimizer = MinuitMinimizer()
+        if hesse_method is None:
+            hesse_method = 'minuit_hesse' if isinstance(minimizer, MinuitMinimizer) else 'autodiff_hesse'
+        if sess is not None:
+            self.sess = sess
+            minimizer.sess = sess
+
+        self.model = model
+        self.n_events = n_events
+        self.limits = limits
+        self.params = sorted(params, key=lambda param: param.name)
+        self.minimizer = minimizer
+        self.compute_errors = compute_errors
+        self.hesse_method = hesse_method
+        self.true_values = self.sess.run(self.params)
+        self._set_true_values_op = tf.group(*[param.assign(value, read_value=False)
+                                              for param, value in zip(self.params, self.true_values)])
+
+        sample = model.sample(n=n_events, limits=limits)
+        self._sample_var = ResourceVariable(initial_value=tf.zeros(shape=(model.n_obs, n_events),
+                                                                   dtype=ztypes.float),
+                                            trainable=False, name="toy_sample")
+        self.sess.run(self._sample_var.initializer)
+        self._generate_op = self._sample_var.assign(sample, read_value=False)
+        self.data = zfit.data.Data.from_tensors(obs=model.obs, tensors=self._sample_var)
+        loss_class = ExtendedUnbinnedNLL if model.is_extended else UnbinnedNLL
+        self.loss = loss_class(model=model, data=self.data, fit_range=limits)
+
+    def generate(self):
+        """Set the parameters to their true values and generate a new sample into `data`."""
+        self.sess.run(self._set_true_values_op)
+        self.sess.run(self._generate_op)
+
+    def fit(self) -> "zfit.minimizers.fitresult.FitResult":
+        """Fit the current sample, starting from the true values.
+
+        Returns:
+            FitResult:
+        """
+        self.sess.run(self._set_true_values_op)
+        result = self.minimizer.minimize(loss=self.loss, params=self.params)
+        if self.compute_errors:
+            result.hesse(params=self.params, method=self.hesse_method)
+        return result
+
+    def run(self, n_toys: int) -> OrderedDict:
+        """Generate and fit `n_toys` toys.
+
+        Args:
+            n_toys (int): Number of toys.
+
+        Returns:
+            OrderedDict: The results as columns (name: `np.ndarray` with one entry per toy): the value and,
+                if `compute_errors` is True, the Hessian error (`name + '_error'`) of every parameter as
+                well as 'fmin', 'edm' and 'converged'.
+        """
+        columns = OrderedDict()
+        for param in self.params:
+            columns[param.name] = []
+            if self.compute_errors:
+                columns[param.name + '_error'] = []
+        for name in ('fmin', 'edm', 'converged'):
+            columns[name] = []
+
+        for _ in range(n_toys):
+            self.generate()
+            result = self.fit()
+            if self.compute_errors:
+                errors = result.hesse(params=self.params, method=self.hesse_method)  # cached by `fit`
+            for param in self.params:
+                columns[param.name].append(result.params[param]['value'])
+                if self.compute_errors:
+                    columns[param.name + '_error'].append(errors[param]['error'])
+            columns['fmin'].append(result.fmin)
+            columns['edm'].append(result.edm)
+            columns['converged'].append(result.converged)
+        return OrderedDict((name, np.array(column)) for name, column in columns.items())
+
+
+@contextlib.contextmanager
+def _seeded(seed):
+    """Seed numpy and the ops created in the default graph, restoring the previous seeds afterwards."""
+    numpy_state = np.random.get_state()
+    graph = tf.get_default_graph()
+    graph_seed = graph.seed
+    np.random.seed(seed)
+    graph.seed = seed  # has to be set before any op is created
+    try:
+        yield
+    finally:
+        np.random.set_state(numpy_state)
+        graph.seed = graph_seed
+
+
+def _run_toys_worker(create_study, n_toys, seed, cpu):
+    if cpu:
+        zfit.run.set_n_cpu(n_cpu=cpu, pin=True)
+        zfit.run.create_session()
+    with _seeded(seed):
+        study = create_study()
+        return study.run(n_toys=n_toys)
+
+
+def run_toys(create_study: Callable, n_toys: int, n_workers: Union[None, int] = None,
+             seed: Union[None, int] = None) -> OrderedDict:
+    """Run a toy study with `n_toys` toys distributed over `n_workers` processes.
+
+    Every worker is a new process (started with 'spawn', as a TensorFlow runtime can't be forked) that
+    builds its own graph and session by calling `create_study` and runs its share of the toys. The CPUs
+    of `zfit.run` are split into disjoint blocks and every worker is pinned to its block, so that the
+    workers do not compete for the CPUs.
+
+    Args:
+        create_study (callable): Takes no arguments and returns a `ToyStudy`. Has to be picklable, e.g. a
+            function defined at module level, since it is sent to the worker processes.
+        n_toys (int): Total number of toys.
+        n_workers (int): Number of worker processes. If None, one per CPU of `zfit.run`. At most one per
+            CPU of `zfit.run` is used. If 1, the toys are run in the current process and graph.
+        seed (int): Seed of the first worker, the others use the following integers. If None, a random one.
+
+    Returns:
+        OrderedDict: The results of all workers as returned by :py:meth:`ToyStudy.run`.
+    """
+    if n_workers is None:
+        n_workers = max(zfit.run.n_cpu, 1)
+    n_workers = min(n_workers, n_toys)
+    if seed is None:
+        seed = np.random.randint(2 ** 30)
+    if n_workers > 1:
+        with zfit.run.aquire_cpu(max_cpu=-1) as cpu:
+            worker_cpu = split_cpu(cpu, n_blocks=n_workers)  # at most one worker per CPU
+            n_workers = len(worker_cpu)
+            if n_workers > 1:
+                n_toys_per_worker, n_toys_left = divmod(n_toys, n_workers)
+                worker_args = [(create_study, n_toys_per_worker + (i < n_toys_left), seed + i, worker_cpu[i])
+                               for i in range(n_workers)]
+                with multiprocessing.get_context('spawn').Pool(processes=n_workers) as pool:
+                    worker_results = pool.starmap(_run_toys_worker, worker_args)
+                return OrderedDict((name, np.concatenate([result[name] for result in worker_results]))
+                                   for name in worker_results[0])
+    return _run_toys_worker(create_study=create_study, n_toys=n_toys, seed=seed, cpu=None)
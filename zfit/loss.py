@@ -1 +1 @@
-from .core.loss import ExtendedUnbinnedNLL, UnbinnedNLL, BaseLoss, SimpleLoss
+from .core.loss import ExtendedUnbinnedNLL, UnbinnedNLL, BinnedNLL, ExtendedBinnedNLL, BaseLoss, SimpleLoss
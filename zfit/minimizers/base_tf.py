@@ -11,12 +11,17 @@ class WrapOptimizer(BaseMinimizer):
             raise TypeError("optimizer {} has to be from class Optimizer".format(str(optimizer)))
         super().__init__(tolerance=tolerance, *args, **kwargs)
         self._optimizer_tf = optimizer
+        self._minimization_steps = {}  # by (id(loss), params), shared with the copies
 
     def _step_tf(self, loss, params):
-        loss = loss.value()
         # var_list = self.get_parameters()
         var_list = params
-        minimization_step = self._optimizer_tf.minimize(loss=loss, var_list=var_list)
+        key = id(loss), tuple(var_list)
+        cached_loss, minimization_step = self._minimization_steps.get(key, (None, None))
+        if cached_loss is loss:
+            return minimization_step
+        minimization_step = self._optimizer_tf.minimize(loss=self._get_loss_value(loss), var_list=var_list)
+        self._minimization_steps[key] = loss, minimization_step
 
         # auto-initialize variables from optimizer
         all_params = list(self._optimizer_tf.variables())
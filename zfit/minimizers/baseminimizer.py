@@ -5,6 +5,7 @@ Definition of minimizers, wrappers etc.
 
 import collections
 from collections import OrderedDict
+from contextlib import ExitStack
 import copy
 
 import numpy as np
@@ -32,6 +33,7 @@ class BaseMinimizer(SessionHolderMixin, ZfitMinimizer):
         self.name = name
         self.tolerance = tolerance
         self._sess = None
+        self._loss_values = {}  # shared with the copies: they minimize the same losses
 
     def _check_input_params(self, loss: ZfitLoss, params, only_floating=True):
         if isinstance(params, (str, tf.Variable)) or (not hasattr(params, "__len__") and params is not None):
@@ -69,6 +71,14 @@ class BaseMinimizer(SessionHolderMixin, ZfitMinimizer):
         feed_dict = {param.placeholder: val for param, val in zip(params, values)}
         return self.sess.run(self._extract_update_op(params), feed_dict=feed_dict)
 
+    def _get_loss_value(self, loss):
+        """Return the value of `loss`, built only once, so that repeated minimizations reuse the graph."""
+        cached_loss, loss_value = self._loss_values.get(id(loss), (None, None))
+        if cached_loss is not loss:  # keyed by id: equal losses can still differ, e.g. in their data
+            loss_value = loss.value()
+            self._loss_values[id(loss)] = loss, loss_value
+        return loss_value
+
     @property
     def tolerance(self):
         return self._tolerance
@@ -104,19 +114,57 @@ class BaseMinimizer(SessionHolderMixin, ZfitMinimizer):
         params = self._check_input_params(params)
         return self._step(params=params)
 
-    def minimize(self, loss: ZfitLoss, params: ztyping.ParamsTypeOpt = None) -> FitResult:
+    def minimize(self, loss: ZfitLoss, params: ztyping.ParamsTypeOpt = None,
+                 init: FitResult = None) -> FitResult:
         """Fully minimize the `loss` with respect to `params`.
 
         Args:
             loss (ZfitLoss): Loss to be minimized.
             params (list(`zfit.Parameter`): The parameters with respect to which to
                 minimize the `loss`. If `None`, the parameters will be taken from the `loss`.
+            init (FitResult): Warm start from the result of a similar fit, e.g. of the previous toy or
+                systematic variation: the parameters found in `init` (the same objects or, for a rebuilt
+                loss, with the same names) start at its minimum and their step sizes are set to its
+                errors for this minimization, see :py:meth:`_init_errors`.
 
         Returns:
             `FitResult`: The fit result.
         """
         params = self._check_input_params(loss=loss, params=params)
-        return self._hook_minimize(loss=loss, params=params)
+        if init is None:
+            return self._hook_minimize(loss=loss, params=params)
+        init_values = {param.name: param_result['value'] for param, param_result in init.params.items()}
+        init_errors = self._init_errors(init)
+        with ExitStack() as stack:
+            for param in params:
+                if param.name in init_values:
+                    param.load(value=init_values[param.name], session=self.sess)
+                error = init_errors.get(param.name)
+                if error is not None and np.isfinite(error) and error > 0:
+                    stack.enter_context(param.set_step_size(error))
+            return self._hook_minimize(loss=loss, params=params)
+
+    @staticmethod
+    def _init_errors(init: FitResult) -> dict:
+        """Return the approximate errors of the parameters of `init` by their names.
+
+        Taken from the first available of: a covariance cached in `init`, the errors calculated with
+        :py:meth:`FitResult.hesse` and the errors the minimizer of `init` estimated during the minimization.
+        """
+        errors = init.minimizer._approx_errors()
+        for param, param_result in init.params.items():
+            for hesse_result in param_result.values():
+                if isinstance(hesse_result, dict) and 'error' in hesse_result:
+                    errors[param.name] = hesse_result['error']
+                    break
+        for covariance in init._covariances.values():
+            errors.update(zip([param.name for param in init.params], np.sqrt(np.diag(covariance))))
+            break
+        return errors
+
+    def _approx_errors(self) -> dict:
+        """Return the errors of the parameters (by name) estimated during the last minimization, if any."""
+        return {}
 
     def _hook_minimize(self, loss, params):
         return self._call_minimize(loss=loss, params=params)
@@ -139,8 +187,10 @@ class BaseMinimizer(SessionHolderMixin, ZfitMinimizer):
         except NotImplementedError:
             step_fn = self.step
         else:
+            loss_value = self._get_loss_value(loss)
+
             def step_fn(loss, params):
-                return self.sess.run([step, loss.value()])
+                return self.sess.run([step, loss_value])
 
         while sum(sorted(changes)[-3:]) > self.tolerance:  # TODO: improve condition
             _, cur_val = step_fn(loss=loss, params=params)
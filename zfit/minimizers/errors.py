@@ -0,0 +1,172 @@
+"""Calculate asymmetric errors: by profiling the loss with any minimizer and in several processes."""
+from collections import OrderedDict
+import multiprocessing
+from typing import Callable, List, Union
+
+import numpy as np
+import tensorflow as tf
+
+import zfit
+from ..core.interfaces import ZfitParameter
+from ..util.execution import split_cpu
+
+
+class _Profiler:
+
+    def __init__(self, loss, minimizer, params, sess):
+        """Minimize `loss` with one of `params` fixed, with the same graph for every parameter and value."""
+        self.loss = loss
+        self.minimizer = minimizer
+        self.params = params
+        self.sess = sess
+        self._placeholders = [tf.placeholder(dtype=param.dtype, shape=param.shape) for param in params]
+        self._load_op = tf.group(*[param.assign(placeholder, read_value=False)
+                                   for param, placeholder in zip(params, self._placeholders)])
+        self._value = loss.value()
+        gradients = tf.gradients(self._value, params)
+        self._gradients = [tf.zeros_like(self._value) if grad is None else grad for grad in gradients]
+
+    def load(self, values):
+        self.sess.run(self._load_op, feed_dict=dict(zip(self._placeholders, values)))
+
+    def profile(self, param, value, start_values):
+        """Return the minimum of the loss with `param` fixed to `value` and its derivative by `value`.
+
+        The other parameters start from `start_values`. At the minimum, the derivative of the profiled loss
+        equals the partial derivative of the loss with respect to `param`.
+        """
+        index = self.params.index(param)
+        values = list(start_values)
+        values[index] = value
+        self.load(values)
+        nuisance_params = [p for p in self.params if p is not param]
+        if nuisance_params:
+            self.minimizer.minimize(loss=self.loss, params=nuisance_params)
+        loss_value, gradients = self.sess.run([self._value, self._gradients])
+        return loss_value, gradients[index]
+
+
+def profile_errors(result: "zfit.minimizers.fitresult.FitResult", params: List[ZfitParameter],
+                   sigma: float = 1., tolerance: float = 1e-3, max_iter: int = 50) -> OrderedDict:
+    """Find the values of `params` where the profiled loss rises by `sigma` standard deviations.
+
+    For every parameter and direction, the root of the profiled loss (minimized with respect to the other
+    parameters of the fit with a copy of the minimizer of `result`) minus the threshold is searched with
+    Newton steps, safeguarded by bisection. The derivative of the profiled loss is its gradient with respect
+    to the parameter, computed in the graph. The search starts at the Hessian error and every minimization
+    starts from the linear prediction of the other parameters given by the covariance.
+
+    Args:
+        result (FitResult): The result to calculate the errors of.
+        params (list(ZfitParameter)): The parameters to calculate the errors of.
+        sigma (float): The loss rises by its errordef times `sigma` squared.
+        tolerance (float): The search stops if the profiled loss is closer to the threshold than this
+            fraction of the rise.
+        max_iter (int): Maximum number of profiled points per parameter and direction.
+
+    Returns:
+        OrderedDict: For every parameter a dict with the (negative) 'lower' and the 'upper' error and
+            'is_valid', which is False if the search did not converge or hit a limit of the parameter.
+    """
+    loss = result.loss
+    rise = loss.errordef(1.) * sigma ** 2
+    fit_params = list(result.params.keys())
+    minimum = np.array([param_result['value'] for param_result in result.params.values()])
+    covariance = result.covariance(method='autodiff_hesse')
+    profiler = _Profiler(loss=loss, minimizer=result.minimizer.copy(), params=fit_params, sess=result.sess)
+
+    errors = OrderedDict()
+    for param in params:
+        index = fit_params.index(param)
+        slope = covariance[:, index] / covariance[index, index]  # of the other parameters
+        hesse_error = sigma * np.sqrt(covariance[index, index])
+        limits = result.sess.run([param.lower_limit, param.upper_limit])
+        param_errors = {'is_valid': True}
+        for direction, name in ((-1, 'lower'), (1, 'upper')):
+            limit = limits[0] if direction < 0 else limits[1]
+            inner, outer = minimum[index], None  # brackets the root once `outer` is found
+            value = minimum[index] + direction * hesse_error
+            converged = False
+            for _ in range(max_iter):
+                value = min(max(value, limits[0]), limits[1])
+                start_values = minimum + slope * (value - minimum[index])
+                loss_value, derivative = profiler.profile(param=param, value=value, start_values=start_values)
+                delta = loss_value - result.fmin - rise
+                if abs(delta) < tolerance * rise:
+                    converged = True
+                    break
+                if delta < 0:
+                    if value == limit:
+                        break
+                    inner = value
+                else:
+                    outer = value
+                new_value = value - delta / derivative if derivative != 0 else None
+                if outer is None:
+                    too_short = new_value is None or direction * (new_value - value) <= 0
+                    value = minimum[index] + 2 * (value - minimum[index]) if too_short else new_value
+                elif new_value is None or not min(inner, outer) < new_value < max(inner, outer):
+                    value = (inner + outer) / 2
+                else:
+                    value = new_value
+            param_errors[name] = value - minimum[index]
+            param_errors['is_valid'] = param_errors['is_valid'] and converged
+        errors[param] = param_errors
+    profiler.load(minimum)
+    return errors
+
+
+def _error_worker(create_loss, minimizer_class, tolerance, values, param_names, method, sigma, cpu):
+    if cpu:
+        zfit.run.set_n_cpu(n_cpu=cpu, pin=True)
+        zfit.run.create_session()
+    loss = create_loss()
+    params_by_name = {param.name: param for param in loss.get_dependents(only_floating=False)}
+    fit_params = [params_by_name[name] for name in values]
+    for param, value in zip(fit_params, values.values()):
+        param.load(value=value, session=zfit.run.sess)
+    # starts at the minimum: restores the state of the minimizer with a few evaluations
+    result = minimizer_class(tolerance=tolerance).minimize(loss=loss, params=fit_params)
+    errors = result.error(params=[params_by_name[name] for name in param_names], method=method,
+                          error_name='error', sigma=sigma)
+    return OrderedDict((param.name, error) for param, error in errors.items())
+
+
+def parallel_errors(result: "zfit.minimizers.fitresult.FitResult", params: List[ZfitParameter],
+                    method: Union[str, Callable], sigma: float, n_workers: int,
+                    create_loss: Callable) -> OrderedDict:
+    """Split `params` into `n_workers` groups and calculate the errors of every group in its own process.
+
+    Every worker is a new process (started with 'spawn') pinned to its share of the CPUs of `zfit.run`.
+    It builds the loss with `create_loss`, minimizes it with a new minimizer of the same class as the one of
+    `result` starting from the minimum of `result` and calculates the errors of its parameters with `method`.
+
+    Args:
+        result (FitResult): The result to calculate the errors of.
+        params (list(ZfitParameter)): The parameters to calculate the errors of.
+        method (str or callable): The error method, see :py:meth:`FitResult.error`. A callable has to be
+            picklable.
+        sigma (float): The errors are calculated for `sigma` standard deviations.
+        n_workers (int): Number of worker processes, at most one per CPU of `zfit.run` is used.
+        create_loss (callable): Takes no arguments and returns the loss, which depends on parameters with the
+            same names as the ones of `result`. Has to be picklable.
+
+    Returns:
+        OrderedDict: The errors of every parameter, as returned by `method`.
+    """
+    values = OrderedDict((param.name, param_result['value']) for param, param_result in result.params.items())
+    minimizer = result.minimizer
+    with zfit.run.aquire_cpu(max_cpu=-1) as cpu:
+        worker_cpu = split_cpu(cpu, n_blocks=min(n_workers, len(params)))  # at most one worker per CPU
+        if not worker_cpu:
+            raise RuntimeError("No CPU of `zfit.run` is available for the worker processes.")
+        param_groups = np.array_split(np.arange(len(params)), len(worker_cpu))
+        worker_args = [(create_loss, type(minimizer), minimizer.tolerance, values,
+                        [params[i].name for i in group], method, sigma, group_cpu)
+                       for group, group_cpu in zip(param_groups, worker_cpu)]
+        with multiprocessing.get_context('spawn').Pool(processes=len(worker_args)) as pool:
+            worker_results = pool.starmap(_error_worker, worker_args)
+    errors = {}
+    for worker_result in worker_results:
+        errors.update(worker_result)
+    return OrderedDict((param, errors[param.name]) for param in params)
@@ -0,0 +1,236 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import numpy as np
+import tensorflow as tf
+
+import zfit
+from ..core.interfaces import ZfitLoss
+from ..util.execution import SessionHolderMixin
+from ..util.graph import variables_read_after
+
+
+class LossEval(SessionHolderMixin):
+
+    def __init__(self, loss: ZfitLoss, params: List["zfit.Parameter"], sess: tf.Session = None):
+        """Evaluate the value and the gradient of `loss` with respect to `params` with minimal session calls.
+
+        The graph for the loss, the gradients and the loading of the parameters is built once. The
+        parameter values are fed through placeholders and loaded in the same run that evaluates the loss,
+        which reads the parameters only after loading them. If the graph of the loss reads a parameter
+        without depending on the loading (e.g. in a constraint built before), the values are loaded in a
+        separate run instead. The last point is memoized: the value and the gradient at the same point are
+        not evaluated again.
+
+        Only the value is evaluated by `value`, the gradient lazily by `gradient` (evaluating the value
+        again). If `fuse_gradient` is True, `value` evaluates the gradient together with the value in one
+        run, which is faster if the gradient is requested at (almost) every point, as by Migrad.
+
+        If `zfit.run.parallel.components` is True and `loss` is a simultaneous loss, every component
+        is evaluated in its own run, concurrently in a pool of threads created once (one thread per component
+        at most). Every evaluation uses one thread per CPU acquired from `zfit.run.aquire_cpu`, which runs in
+        the inter-op thread pool of its CPU. Only the value and the gradient of each component are fetched
+        and summed.
+
+        Args:
+            loss (ZfitLoss): The loss to evaluate.
+            params (list(`zfit.Parameter`)): The parameters in the order the values will be given.
+            sess (tf.Session): The session to run the graph in. If None, the default zfit session is used.
+        """
+        super().__init__()
+        if sess is not None:
+            self.sess = sess
+        self.loss = loss
+        self.params = list(params)
+        self.n_eval = 0
+        self.fuse_gradient = False
+
+        self._components = loss.get_components() if zfit.run.parallel.components else [loss]
+        self._placeholders = [tf.placeholder(dtype=param.dtype, shape=param.shape) for param in self.params]
+        self._assign_ops = [param.assign(placeholder, read_value=False)
+                            for param, placeholder in zip(self.params, self._placeholders)]
+        self._load_op = tf.group(*self._assign_ops)
+        self._built_loading_tensors = None
+        self._built_components_tensors = None
+        self._built_executor = None
+        self._cached_values = None
+        self._cached_loss = None
+        self._cached_gradients = None
+        self._batch_tensors = {}
+
+    def _value_gradients_tensors(self, loss):
+        value = loss.value()
+        gradients = tf.gradients(value, self.params)
+        gradients = [tf.zeros_like(param) if grad is None else grad  # loss independent of param
+                     for param, grad in zip(self.params, gradients)]
+        return value, gradients
+
+    @property
+    def _loading_tensors(self):
+        """The value and gradients of the loss evaluated after loading the fed values, built when needed.
+
+        None if the graph reads a parameter without waiting for the loading or if there are several
+        components (they are evaluated in several runs and the values are loaded only once).
+        """
+        if self._built_loading_tensors is None:
+            loading_tensors = False
+            if len(self._components) == 1:
+                with tf.control_dependencies(self._assign_ops):
+                    loaded = tf.constant(True)  # a Tensor (not only an op) is kept as a dependency in loops
+                with tf.control_dependencies([loaded]):
+                    value, gradients = self._value_gradients_tensors(self._components[0])
+                if variables_read_after(tensors=[value] + gradients, op=loaded.op, variables=self.params):
+                    loading_tensors = value, gradients
+            self._built_loading_tensors = loading_tensors
+        return self._built_loading_tensors or None
+
+    @property
+    def _components_tensors(self):
+        """The value and gradients of every component at the loaded values (built when first needed)."""
+        if self._built_components_tensors is None:
+            self._built_components_tensors = [self._value_gradients_tensors(component)
+                                              for component in self._components]
+        return self._built_components_tensors
+
+    @property
+    def _executor(self):
+        """The threads evaluating the components, one per component at most (created when first needed).
+
+        The threads are started when used and stopped when the `LossEval` is garbage collected.
+        """
+        if self._built_executor is None:
+            self._built_executor = ThreadPoolExecutor(max_workers=len(self._components))
+        return self._built_executor
+
+    def _run_components(self, gradient):
+        components_tensors = [tensors if gradient else tensors[0] for tensors in self._components_tensors]
+        if len(components_tensors) == 1:
+            return self.sess.run(components_tensors[0])
+        with zfit.run.aquire_cpu(max_cpu=len(components_tensors)) as cpu:
+            cpu = [[single_cpu] for single_cpu in cpu] if cpu else [[]]
+            # every worker evaluates its share of the components in the thread pool of its cpu
+            components_per_worker = [components_tensors[i::len(cpu)] for i in range(len(cpu))]
+
+            def run_components(worker_components_tensors, worker_cpu):
+                options = zfit.run.get_run_options(cpu=worker_cpu)
+                return [self.sess.run(tensors, options=options) for tensors in worker_components_tensors]
+
+            results = self._executor.map(run_components, components_per_worker, cpu)
+            results = [result for worker_results in results for result in worker_results]
+        if not gradient:
+            return sum(results)
+        loss_value = sum(value for value, _ in results)
+        gradients = np.sum([gradients for _, gradients in results], axis=0)
+        return loss_value, gradients
+
+    def _evaluate(self, values, gradient):
+        """Evaluate the loss (and the gradient) at `values` and memoize them."""
+        if self._loading_tensors is None:
+            self.load(values=values)
+            result = self._run_components(gradient=gradient)
+        else:
+            feed_dict = {placeholder: value for placeholder, value in zip(self._placeholders, values)}
+            value, gradients = self._loading_tensors
+            result = self.sess.run((value, gradients) if gradient else value, feed_dict=feed_dict)
+        self.n_eval += 1
+        self._cached_values = values
+        if gradient:
+            self._cached_loss, gradients = result
+            self._cached_gradients = np.array(gradients)
+        else:
+            self._cached_loss = result
+            self._cached_gradients = None
+
+    def _is_cached(self, values):
+        return self._cached_values is not None and np.array_equal(values, self._cached_values)
+
+    def reset_cache(self):
+        """Forget the memoized point, e.g. if the data changed."""
+        self._cached_values = None
+        self._cached_loss = None
+        self._cached_gradients = None
+
+    def load(self, values):
+        """Load `values` into the parameters with a single session run.
+
+        Args:
+            values (iterable): The values in the same order as `params`.
+        """
+        feed_dict = {placeholder: value for placeholder, value in zip(self._placeholders, values)}
+        self.sess.run(self._load_op, feed_dict=feed_dict)
+
+    def value_gradient(self, values):
+        """Return the value and the gradient of the loss at `values`.
+
+        Args:
+            values (iterable): The values of the parameters in the same order as `params`.
+
+        Returns:
+            tuple(float, numpy.ndarray): The value of the loss and its gradient.
+        """
+        values = np.array(values, dtype=np.float64)
+        if not self._is_cached(values) or self._cached_gradients is None:
+            self._evaluate(values=values, gradient=True)
+        return self._cached_loss, self._cached_gradients
+
+    def value(self, values):
+        """Return the value of the loss at `values`, the gradient is evaluated as well if `fuse_gradient`."""
+        if self.fuse_gradient:
+            return self.value_gradient(values=values)[0]
+        values = np.array(values, dtype=np.float64)
+        if not self._is_cached(values):
+            self._evaluate(values=values, gradient=False)
+        return self._cached_loss
+
+    def gradient(self, values):
+        """Return the gradient of the loss at `values`. The value is evaluated (and memoized) as well."""
+        return self.value_gradient(values=values)[1]
+
+    def _get_batch_tensors(self, gradient):
+        if gradient not in self._batch_tensors:
+            fetches = [tf.add_n([value for value, _ in self._components_tensors])]
+            if gradient:
+                fetches.append(tf.add_n([tf.stack(gradients) for _, gradients in self._components_tensors]))
+            with tf.control_dependencies(fetches):  # load the next point after evaluating the current one
+                load_next_op = tf.group(*[param.assign(placeholder, read_value=False)
+                                          for param, placeholder in zip(self.params, self._placeholders)])
+            self._batch_tensors[gradient] = fetches, load_next_op
+        return self._batch_tensors[gradient]
+
+    def value_batch(self, values, gradient: bool = False):
+        """Evaluate the loss (and the gradient) at a batch of points with one session run per point.
+
+        Each run evaluates the loss at the loaded point and then loads the next point, so no separate
+        run is needed to load the values. After the last point, the parameters are set back to the
+        values they had before.
+
+        Args:
+            values (numpy.ndarray): The points with shape (n_points, n_params) with the parameter values in
+                the same order as `params`.
+            gradient (bool): If True, evaluate the gradient as well.
+
+        Returns:
+            numpy.ndarray or tuple(numpy.ndarray, numpy.ndarray): The values of the loss with shape
+                (n_points,) and, if `gradient` is True, the gradients with shape (n_points, n_params).
+        """
+        values = np.array(values, dtype=np.float64)
+        if values.ndim != 2 or values.shape[1] != len(self.params):
+            raise ValueError("`values` has to have the shape (n_points, {}), not {}".format(
+                len(self.params), values.shape))
+        fetches, load_next_op = self._get_batch_tensors(gradient=gradient)
+        old_values = self.sess.run(self.params)
+        self.reset_cache()
+        results = []
+        if len(values) > 0:
+            self.load(values=values[0])
+            for next_values in list(values[1:]) + [old_values]:
+                feed_dict = {placeholder: value
+                             for placeholder, value in zip(self._placeholders, next_values)}
+                results.append(self.sess.run(fetches + [load_next_op], feed_dict=feed_dict)[:-1])
+            self.n_eval += len(values)
+
+        loss_values = np.array([result[0] for result in results])
+        if gradient:
+            gradients = np.array([result[1] for result in results]).reshape((len(values), len(self.params)))
+            return loss_values, gradients
+        return loss_values
@@ -1,15 +1,19 @@
 from collections import OrderedDict, defaultdict
-from typing import Dict, Union, Callable, Optional
+from typing import Dict, List, Tuple, Union, Callable, Optional
 
+import numpy as np
 import tensorflow as tf
 
 import zfit
+from zfit import ztf
 from zfit.util.execution import SessionHolderMixin
 from .interface import ZfitMinimizer, ZfitResult
 from ..util.ztyping import ParamsTypeOpt
 from ..core.interfaces import ZfitLoss, ZfitParameter
 from ..util.temporary import TemporarilySet
 from ..util.container import convert_to_container
+from ..util.cache import get_cache_switch
+from .errors import parallel_errors, profile_errors
 
 
 def _hesse_minuit(result: "FitResult", params, sigma=1.0):
@@ -30,6 +34,97 @@ def _hesse_minuit(result: "FitResult", params, sigma=1.0):
     return result
 
 
+def _hessian_matrix_tensor(value, params):
+    """Return the Hessian matrix of `value` with respect to `params` as a Tensor."""
+    gradients = tf.gradients(value, params)
+    rows = []
+    for gradient in gradients:
+        second_derivatives = tf.gradients(gradient, params)
+        rows.append(tf.stack([tf.zeros_like(gradient) if derivative is None else derivative
+                              for derivative in second_derivatives]))
+    return tf.stack(rows)
+
+
+def _covariance_minuit(result: "FitResult"):
+    """Covariance from the Hessian that Minuit estimates numerically (as for 'minuit_hesse')."""
+    minimizer = result.minimizer
+    from zfit.minimizers.minimizer_minuit import MinuitMinimizer
+    if not isinstance(minimizer, MinuitMinimizer):
+        raise TypeError("Cannot calculate the 'minuit_hesse' covariance with a different minimizer then"
+                        "`MinuitMinimizer`.")
+    minuit = minimizer._minuit_minimizer
+    minuit.hesse()
+    minuit_covariance = minuit.np_matrix()
+    minuit_indices = {name: i for i, name in enumerate(minuit.parameters)}
+    indices = [minuit_indices[param.name] for param in result.params]
+    return np.asarray(minuit_covariance)[np.ix_(indices, indices)]
+
+
+def _covariance_scale(loss):
+    """Return the factor between the inverse Hessian of `loss` and the covariance (given by the errordef)."""
+    return 2. * loss.errordef(1.)
+
+
+def _evaluate_at_minimum(result: "FitResult", tensors):
+    """Run `tensors` with the parameters at the minimum of `result` and with the caches disabled.
+
+    The caches do not store second derivatives.
+    """
+    for param, param_result in result.params.items():
+        param.load(value=param_result['value'], session=result.sess)
+    return result.sess.run(tensors, feed_dict={get_cache_switch(): False})
+
+
+def _errors_from_covariance(result: "FitResult", covariance, params, sigma=1.0):
+    all_params = list(result.params.keys())
+    errors = sigma * np.sqrt(np.diag(covariance))
+    return OrderedDict((param, {'error': errors[all_params.index(param)]}) for param in params)
+
+
+def _covariance_autodiff(result: "FitResult"):
+    """Covariance from the exact Hessian of the loss, built in the graph with automatic differentiation."""
+    hessian = _hessian_matrix_tensor(result.loss.value(), list(result.params.keys()))
+    hessian = _evaluate_at_minimum(result=result, tensors=hessian)
+    return _covariance_scale(result.loss) * np.linalg.inv(hessian)
+
+
+def _hesse_autodiff(result: "FitResult", params, sigma=1.0):
+    return _errors_from_covariance(result=result, covariance=result.covariance(method='autodiff_hesse'),
+                                   params=params, sigma=sigma)
+
+
+def _covariance_sumw2(result: "FitResult"):
+    """Covariance of a weighted fit, corrected with the sum of the squared weights.
+
+    The covariance is :math:`H_w^{-1} H_{w^2} H_w^{-1}`, where :math:`H_w` is the Hessian of the loss
+    and :math:`H_{w^2}` the Hessian of the same loss with the squared weights. Both are taken with respect
+    to all parameters of the fit at its minimum. The constraints are not weighted events, so they are
+    included in neither of the Hessians.
+    """
+    loss = result.loss
+    datasets = loss.data
+    if not any(getattr(data, 'weights', None) is not None for data in datasets):
+        raise ValueError("Cannot calculate the 'sumw2_hesse' error of a fit to unweighted data.")
+    weights_loss = loss._create_similar(model=loss.model, data=datasets, fit_range=loss.fit_range,
+                                        constraints=None)
+    squared_weights_data = [data if data.weights is None else data.with_weights(data.weights ** 2)
+                            for data in datasets]
+    squared_weights_loss = loss._create_similar(model=loss.model, data=squared_weights_data,
+                                                fit_range=loss.fit_range, constraints=None)
+    all_params = list(result.params.keys())
+    hessian_w = _hessian_matrix_tensor(weights_loss.value(), all_params)
+    hessian_w2 = _hessian_matrix_tensor(squared_weights_loss.value(), all_params)
+
+    hessian_w, hessian_w2 = _evaluate_at_minimum(result=result, tensors=[hessian_w, hessian_w2])
+    inv_hessian_w = np.linalg.inv(hessian_w)
+    return _covariance_scale(loss) * inv_hessian_w.dot(hessian_w2).dot(inv_hessian_w)
+
+
+def _hesse_sumw2(result: "FitResult", params, sigma=1.0):
+    return _errors_from_covariance(result=result, covariance=result.covariance(method='sumw2_hesse'),
+                                   params=params, sigma=sigma)
+
+
 def _minos_minuit(result, params, sigma=1.0):
     fitresult = result
     minimizer = fitresult.minimizer
@@ -45,9 +140,12 @@ def _minos_minuit(result, params, sigma=1.0):
 
 class FitResult(SessionHolderMixin, ZfitResult):
     _default_hesse = 'minuit_hesse'
-    _hesse_methods = {'minuit_hesse': _hesse_minuit}
+    _hesse_methods = {'minuit_hesse': _hesse_minuit, 'autodiff_hesse': _hesse_autodiff,
+                      'sumw2_hesse': _hesse_sumw2}
+    _covariance_methods = {'minuit_hesse': _covariance_minuit, 'autodiff_hesse': _covariance_autodiff,
+                           'sumw2_hesse': _covariance_sumw2}
     _default_error = 'minuit_minos'
-    _error_methods = {"minuit_minos": _minos_minuit}
+    _error_methods = {"minuit_minos": _minos_minuit, "profile_errors": profile_errors}
 
     def __init__(self, params: Dict[ZfitParameter, float], edm: float, fmin: float, status: int, converged: bool,
                  info: dict, loss: ZfitLoss, minimizer: "ZfitMinimizer"):
@@ -80,6 +178,7 @@ class FitResult(SessionHolderMixin, ZfitResult):
         self._info = info
         self._loss = loss
         self._minimizer = minimizer
+        self._covariances = {}  # method: covariance of all params
         # self.param_error = OrderedDict((p, {}) for p in params)
         # self.param_hesse = OrderedDict((p, {}) for p in params)
 
@@ -146,7 +245,10 @@ class FitResult(SessionHolderMixin, ZfitResult):
         Args:
             params (list(`zfit.FitParameters`)): The parameters  to calculate the
                 Hessian symmetric error. If None, use all parameters.
-            method (str): the method to calculate the hessian. Can be {'minuit'} or a callable.
+            method (str): the method to calculate the hessian. Can be {'minuit_hesse', 'autodiff_hesse',
+                'sumw2_hesse'} or a callable. 'autodiff_hesse' builds the exact Hessian in the graph and works
+                with any minimizer. 'sumw2_hesse' corrects the errors of a fit to weighted data with the sum
+                of the squared weights.
             error_name (str): The name for the error in the dictionary.
 
         Returns:
@@ -181,8 +283,76 @@ class FitResult(SessionHolderMixin, ZfitResult):
                 raise KeyError("The following method is not a valid, implemented method: {}".format(method))
         return method(result=self, params=params)
 
+    def covariance(self, params: ParamsTypeOpt = None,
+                   method: Union[str, Callable] = 'autodiff_hesse') -> np.ndarray:
+        """Calculate the covariance matrix of `params`.
+
+        The covariance of all parameters of the fit is calculated only once per method and cached.
+
+        Args:
+            params (list(`zfit.Parameter`)): The parameters, in the order of the rows. If None, all
+                parameters of the fit.
+            method (str or callable): The method to calculate the covariance of all parameters of the fit.
+                Can be {'minuit_hesse', 'autodiff_hesse', 'sumw2_hesse'} or a callable that takes the
+                `FitResult`.
+
+        Returns:
+            numpy.ndarray: The covariance matrix with shape (n_params, n_params).
+        """
+        params = self._input_check_params(params)
+        covariance = self._covariances.get(method)
+        if covariance is None:
+            covariance_method = method
+            if not callable(covariance_method):
+                try:
+                    covariance_method = self._covariance_methods[method]
+                except KeyError:
+                    raise KeyError("The following method is not a valid, implemented method: "
+                                   "{}".format(method))
+            covariance = covariance_method(result=self)
+            self._covariances[method] = covariance
+        indices = [list(self.params.keys()).index(param) for param in params]
+        return covariance[np.ix_(indices, indices)]
+
+    def correlation(self, params: ParamsTypeOpt = None,
+                    method: Union[str, Callable] = 'autodiff_hesse') -> np.ndarray:
+        """Calculate the correlation matrix of `params`, see :py:meth:`covariance` for the arguments."""
+        covariance = self.covariance(params=params, method=method)
+        errors = np.sqrt(np.diag(covariance))
+        return covariance / np.outer(errors, errors)
+
+    def propagate_errors(self, values: Union[tf.Tensor, List[tf.Tensor]],
+                         method: Union[str, Callable] = 'autodiff_hesse') -> Tuple[np.ndarray, np.ndarray]:
+        """Propagate the (cached) covariance of the parameters to `values` that depend on them.
+
+        The Jacobian of all `values` with respect to the parameters of the fit is built in the graph and
+        evaluated in one run at the minimum, the covariance of the values is :math:`J C J^T`.
+
+        Args:
+            values (tf.Tensor or list(tf.Tensor)): Scalar functions of the parameters, e.g. derived yields,
+                fractions or `ComposedParameter`.
+            method (str or callable): The method to calculate the covariance of the parameters, see
+                :py:meth:`covariance`.
+
+        Returns:
+            tuple(numpy.ndarray, numpy.ndarray): The `values` at the minimum with shape (n_values,) and their
+                covariance matrix with shape (n_values, n_values). The errors are the square root of its
+                diagonal.
+        """
+        values = [ztf.convert_to_tensor(value) for value in convert_to_container(values, container=list)]
+        params = list(self.params.keys())
+        jacobian_rows = []
+        for value in values:
+            gradients = tf.gradients(value, params)
+            jacobian_rows.append(tf.stack([tf.zeros_like(value) if gradient is None else gradient
+                                           for gradient in gradients]))
+        covariance = self.covariance(method=method)
+        values, jacobian = _evaluate_at_minimum(result=self,
+                                                tensors=[tf.stack(values), tf.stack(jacobian_rows)])
+        return values, jacobian.dot(covariance).dot(jacobian.T)
+
     def error(self, params: ParamsTypeOpt = None, method: Union[str, Callable] = 'minuit_minos', error_name: str = None,
-              sigma: float = 1.) -> OrderedDict:
+              sigma: float = 1., n_workers: int = 1, create_loss: Optional[Callable] = None) -> OrderedDict:
 
         """Calculate and set for `params` the asymmetric error using the set error method.
 
@@ -190,13 +360,21 @@ class FitResult(SessionHolderMixin, ZfitResult):
                 params (list(`zfit.FitParameters` or str)): The parameters or their names to calculate the
                      errors. If `params` is `None`, use all *floating* parameters.
                 method (str or Callable): The method to use to calculate the errors. Valid choices are
-                    {'minuit_minos'} or a Callable.
+                    {'minuit_minos', 'profile_errors'} or a Callable. 'profile_errors' profiles the loss with
+                    the minimizer of this result, whichever it is, see
+                    :py:func:`zfit.minimizers.errors.profile_errors`.
                 sigma (float): Errors are calculated with respect to `sigma` std deviations. The definition
                     of 1 sigma depends on the loss function and is defined there.
 
                     For example, the negative log-likelihood (without the factor of 2) has a correspondents
                     of :math:`\Delta` NLL of 1 corresponds to 1 std deviation.
                 error_name (str): The name for the error in the dictionary.
+                n_workers (int): Number of processes to distribute the parameters over. If larger than 1,
+                    `create_loss` has to be given.
+                create_loss (callable): Takes no arguments and builds the loss again in a worker process, with
+                    parameters with the same names. Has to be picklable, e.g. a function defined at module
+                    level. Every worker minimizes it again, starting at this minimum, with a new minimizer of
+                    the same class as this one.
 
 
             Returns:
@@ -213,7 +391,14 @@ class FitResult(SessionHolderMixin, ZfitResult):
         uncached_params = self._get_uncached_params(params=params, method_name=error_name)
 
         if uncached_params:
-            error_dict = self._error(params=uncached_params, method=method, sigma=sigma)
+            if n_workers > 1:
+                if create_loss is None:
+                    raise ValueError("To calculate the errors in several processes, `create_loss` has to be "
+                                     "given.")
+                error_dict = parallel_errors(result=self, params=uncached_params, method=method, sigma=sigma,
+                                             n_workers=n_workers, create_loss=create_loss)
+            else:
+                error_dict = self._error(params=uncached_params, method=method, sigma=sigma)
             self._cache_errors(error_name=error_name, errors=error_dict)
         all_errors = OrderedDict((p, self.params[p][error_name]) for p in params)
         return all_errors
@@ -226,6 +411,67 @@ class FitResult(SessionHolderMixin, ZfitResult):
                 raise KeyError("The following method is not a valid, implemented method: {}".format(method))
         return method(result=self, params=params, sigma=sigma)
 
+    def profile(self, params: ParamsTypeOpt, grid, n_workers: int = 1,
+                create_loss: Optional[Callable] = None) -> OrderedDict:
+        """Scan the profile of the loss over a grid of one or two parameters.
+
+        At every point of the grid, `params` are fixed and the loss is minimized with respect to the other
+        parameters of this result. The points are scanned row by row, every second row backwards, and each
+        minimization starts from the minimum of the previous point. The parameters are set back to the
+        values of this result afterwards.
+
+        Args:
+            params (list(`zfit.Parameter`)): One or two parameters to scan.
+            grid (list(numpy.ndarray)): The values to scan, one array per parameter. For one parameter, the
+                array can be given directly.
+            n_workers (int): Number of processes to split the scan into. If larger than 1, `create_loss`
+                has to be given.
+            create_loss (callable): Takes no arguments and builds the loss again in a worker process, with
+                parameters with the same names. Has to be picklable, e.g. a function defined at module level.
+
+        Returns:
+            OrderedDict: Columns with one entry per point of the grid (as flattened by
+                `numpy.meshgrid(*grid, indexing='ij')`): the values of `params` (by name), the minimum of the
+                loss 'fmin', its difference to the minimum of this result 'delta_fmin' and whether the
+                minimization 'converged'.
+        """
+        from .profile import _snake_order, parallel_profile_scan, profile_scan
+
+        params = convert_to_container(params, container=list)
+        if not 1 <= len(params) <= 2:
+            raise ValueError("Only one or two parameters can be profiled, not {}".format(len(params)))
+        if len(params) == 1 and np.ndim(grid[0]) == 0:
+            grid = [grid]
+        if len(grid) != len(params):
+            raise ValueError("`grid` has to contain one array of values per parameter.")
+        grid = [np.asarray(values, dtype=np.float64) for values in grid]
+        shape = tuple(len(values) for values in grid)
+        points = np.stack([values.ravel() for values in np.meshgrid(*grid, indexing='ij')], axis=1)
+        order = _snake_order(shape)
+
+        nuisance_params = [p for p in self.params if all(p is not param for param in params)]
+        start_values = OrderedDict((p, p_dict['value']) for p, p_dict in self.params.items())
+        for param in params:
+            if param not in start_values:
+                start_values[param] = self.sess.run(param)
+        if n_workers > 1:
+            if create_loss is None:
+                raise ValueError("To profile in several processes, `create_loss` has to be given.")
+            scan = parallel_profile_scan(create_loss=create_loss, minimizer=self.minimizer,
+                                         params=params, points=points[order], nuisance_params=nuisance_params,
+                                         start_values=start_values, n_workers=n_workers)
+        else:
+            # the minimizer of this result keeps its state (e.g. for `hesse`), minimize with a copy
+            scan = profile_scan(loss=self.loss, minimizer=self.minimizer.copy(), params=params,
+                                points=points[order], nuisance_params=nuisance_params,
+                                start_values=start_values, sess=self.sess)
+        grid_order = np.argsort(order)
+        scan = OrderedDict((name, column[grid_order]) for name, column in scan.items())
+        scan['delta_fmin'] = scan['fmin'] - self.fmin
+        scan.move_to_end('converged')
+        return scan
+
+
 # def set_error_method(self, method):
 #     if isinstance(method, str):
 #         try:
@@ -67,7 +67,7 @@ class ZfitMinimizer(pep487.PEP487Object):
     """Define the minimizer interface."""
 
     @abc.abstractmethod
-    def minimize(self, loss, params=None):
+    def minimize(self, loss, params=None, init=None):
         raise NotImplementedError
 
     def _minimize(self, loss, params):
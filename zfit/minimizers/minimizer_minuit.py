@@ -3,11 +3,11 @@ import copy
 from typing import List
 
 import iminuit
-import tensorflow as tf
 
 from zfit.minimizers.fitresult import FitResult
 from ..core.parameter import Parameter
 from .baseminimizer import BaseMinimizer
+from .evaluator import LossEval
 
 
 class MinuitMinimizer(BaseMinimizer):
@@ -18,34 +18,21 @@ class MinuitMinimizer(BaseMinimizer):
             name = self._DEFAULT_name
         super().__init__(name=name, tolerance=tolerance)
         self._minuit_minimizer = None
+        self._loss_eval = None
 
-    def _minimize(self, loss, params: List[Parameter]):
-        loss = loss.value()
-        gradients = tf.gradients(loss, params)
-        assign_params = self._extract_assign_method(params=params)
-
-        def func(values):
+    def _get_loss_eval(self, loss, params):
+        loss_eval = self._loss_eval
+        same_params = loss_eval is not None and len(loss_eval.params) == len(params) and all(
+            param is eval_param for param, eval_param in zip(params, loss_eval.params))
+        if not same_params or loss_eval.loss is not loss or loss_eval.sess is not self.sess:
+            loss_eval = LossEval(loss=loss, params=params, sess=self.sess)  # builds the graph when evaluated
+            self._loss_eval = loss_eval
+        loss_eval.reset_cache()  # the data may have changed
+        return loss_eval
 
-            # feed_dict = {p: v for p, v in zip(placeholders, value)}
-            # self.sess.run(updated_params, feed_dict=feed_dict)
-            for param, value in zip(params, values):
-                param.load(value=value, session=self.sess)
-            # loss_new = tf.identity(loss)
-            loss_new = loss
-            loss_evaluated = self.sess.run(loss_new)
-            # print("Current loss:", loss_evaluated)
-            # print("Current value:", value)
-            return loss_evaluated
-
-        def grad_func(values):
-            # feed_dict = {p: v for p, v in zip(placeholders, value)}
-            # self.sess.run(updated_params, feed_dict=feed_dict)
-            for param, value in zip(params, values):
-                param.load(value=value, session=self.sess)
-            # gradients1 = tf.identity(gradients)
-            gradients1 = gradients
-            gradients_values = self.sess.run(gradients1)
-            return gradients_values
+    def _minimize(self, loss, params: List[Parameter]):
+        loss_eval = self._get_loss_eval(loss=loss, params=params)
+        n_eval_start = loss_eval.n_eval
 
         # create Minuit compatible names
         error_limit_kwargs = {}
@@ -62,17 +49,21 @@ class MinuitMinimizer(BaseMinimizer):
             error_limit_kwargs.update(param_kwargs)
         params_name = [param.name for param in params]
 
-        if self._minuit_minimizer is None:
-            minimizer = iminuit.Minuit(fcn=func, use_array_call=True,
-                                       grad=grad_func,
-                                       forced_parameters=params_name,
-                                       **error_limit_kwargs)
+        minimizer = iminuit.Minuit(fcn=loss_eval.value, use_array_call=True,
+                                   grad=loss_eval.gradient,
+                                   forced_parameters=params_name,
+                                   **error_limit_kwargs)
         self._minuit_minimizer = minimizer
-        result = minimizer.migrad(precision=self.tolerance)
+        loss_eval.fuse_gradient = True  # migrad needs the gradient at most points, hesse and minos never
+        try:
+            result = minimizer.migrad(precision=self.tolerance)
+        finally:
+            loss_eval.fuse_gradient = False
         params_result = [p_dict for p_dict in result[1]]
-        self.sess.run([assign(p['value']) for assign, p in zip(assign_params, params_result)])
+        loss_eval.load(values=[p['value'] for p in params_result])
 
         info = {'n_eval': result[0]['nfcn'],
+                'n_graph_eval': loss_eval.n_eval - n_eval_start,
                 # 'n_iter': result['nit'],
                 # 'grad': result['jac'],
                 # 'message': result['message'],
@@ -87,6 +78,11 @@ class MinuitMinimizer(BaseMinimizer):
                            minimizer=self.copy())
         return result
 
+    def _approx_errors(self):
+        if self._minuit_minimizer is None:
+            return {}
+        return dict(self._minuit_minimizer.errors)  # of the covariance approximated by migrad
+
     def copy(self):
         tmp_minimizer = self._minuit_minimizer
         self._minuit_minimizer = None
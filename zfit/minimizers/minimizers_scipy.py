@@ -13,16 +13,24 @@ class ScipyMinimizer(BaseMinimizer):
     def __init__(self, tolerance=None, name="ScipyMinimizer", **kwargs):
         super().__init__(tolerance=tolerance, name=name)
         self._scipy_init_kwargs = kwargs
+        self._scipy_minimizers = {}  # by (id(loss), params), shared with the copies
+
+    def _get_scipy_minimizer(self, loss, params):
+        """Return the interface to minimize `loss` with respect to `params`, built only once."""
+        cached_loss, minimizer = self._scipy_minimizers.get((id(loss), tuple(params)), (None, None))
+        if cached_loss is not loss:
+            # params_name = self._extract_parameter_names(var_list)
+            var_to_bounds = {p.name: (p.lower_limit, p.upper_limit) for p in params}
+            minimizer = ScipyOptimizerInterface(loss=self._get_loss_value(loss), var_list=params,
+                                                var_to_bounds=var_to_bounds,
+                                                **self._scipy_init_kwargs)
+            self._scipy_minimizers[(id(loss), tuple(params))] = loss, minimizer
+        return minimizer
 
     def _minimize(self, loss, params):
-        loss = loss.value()
         # var_list = self.get_parameters()
         var_list = params
-        # params_name = self._extract_parameter_names(var_list)
-        var_to_bounds = {p.name: (p.lower_limit, p.upper_limit) for p in var_list}
-        minimizer = ScipyOptimizerInterface(loss=loss, var_list=var_list,
-                                            var_to_bounds=var_to_bounds,
-                                            **self._scipy_init_kwargs)
+        minimizer = self._get_scipy_minimizer(loss=loss, params=var_list)
         # self._scipy_minimizer = minimizer
         result = minimizer.minimize(session=self.sess)
         result_values = result['x']
@@ -0,0 +1,122 @@
+"""Profile a loss: minimize the other parameters at every point of a grid of one or two parameters."""
+from collections import OrderedDict
+import multiprocessing
+from typing import Callable, Dict, List
+
+import numpy as np
+import tensorflow as tf
+
+import zfit
+from ..core.interfaces import ZfitLoss, ZfitParameter
+from .interface import ZfitMinimizer
+from ..util.execution import split_cpu
+
+
+def _snake_order(shape):
+    """Return the flat indices of a grid of `shape` in an order where consecutive points are neighbours."""
+    indices = np.arange(int(np.prod(shape))).reshape(shape)
+    if len(shape) == 2:
+        indices[1::2] = indices[1::2, ::-1]  # every second row backwards
+    return indices.ravel()
+
+
+def profile_scan(loss: ZfitLoss, minimizer: ZfitMinimizer, params: List[ZfitParameter], points: np.ndarray,
+                 nuisance_params: List[ZfitParameter], start_values: Dict[ZfitParameter, float],
+                 sess: tf.Session) -> OrderedDict:
+    """Minimize `loss` with respect to `nuisance_params` with `params` fixed at each of the `points`.
+
+    The points are scanned in the given order and every minimization starts from the minimum of the
+    previous point, so neighbouring points should follow each other. The values of all parameters are
+    set to `start_values` before the scan and back to them afterwards.
+
+    Args:
+        loss (ZfitLoss): The loss to profile.
+        minimizer (ZfitMinimizer): The minimizer to minimize the nuisance parameters with.
+        params (list(ZfitParameter)): The parameters that are scanned.
+        points (numpy.ndarray): The values of `params` with shape (n_points, n_params).
+        nuisance_params (list(ZfitParameter)): The parameters to minimize at every point.
+        start_values (dict(ZfitParameter, float)): The values of `params` and `nuisance_params` to start from.
+        sess (tf.Session): The session to run in.
+
+    Returns:
+        OrderedDict: Columns with one entry per point: the values of `params` (by name), the minimum of
+            the loss 'fmin' and whether the minimization 'converged'.
+    """
+    all_params = list(params) + list(nuisance_params)
+    placeholders = [tf.placeholder(dtype=param.dtype, shape=param.shape) for param in all_params]
+    assign_ops = [param.assign(placeholder, read_value=False)
+                  for param, placeholder in zip(all_params, placeholders)]
+    load_all_op = tf.group(*assign_ops)
+    load_params_op = tf.group(*assign_ops[:len(params)])
+    loss_value = None if nuisance_params else loss.value()
+
+    start_feed_dict = {placeholder: start_values[param]
+                       for param, placeholder in zip(all_params, placeholders)}
+    sess.run(load_all_op, feed_dict=start_feed_dict)
+    fmins = []
+    converged = []
+    for point in points:
+        sess.run(load_params_op, feed_dict=dict(zip(placeholders, point)))
+        if nuisance_params:  # the nuisance parameters are still at the minimum of the previous point
+            result = minimizer.minimize(loss=loss, params=nuisance_params)
+            fmins.append(result.fmin)
+            converged.append(result.converged)
+        else:
+            fmins.append(sess.run(loss_value))
+            converged.append(True)
+    sess.run(load_all_op, feed_dict=start_feed_dict)
+
+    columns = OrderedDict((param.name, np.array(points)[:, i]) for i, param in enumerate(params))
+    columns['fmin'] = np.array(fmins)
+    columns['converged'] = np.array(converged)
+    return columns
+
+
+def _profile_scan_worker(create_loss, minimizer_class, tolerance, param_names, points, nuisance_names,
+                         start_values, cpu):
+    if cpu:
+        zfit.run.set_n_cpu(n_cpu=cpu, pin=True)
+        zfit.run.create_session()
+    loss = create_loss()
+    params_by_name = {param.name: param for param in loss.get_dependents(only_floating=False)}
+    params = [params_by_name[name] for name in param_names]
+    nuisance_params = [params_by_name[name] for name in nuisance_names]
+    start_values = {params_by_name[name]: value for name, value in start_values.items()}
+    return profile_scan(loss=loss, minimizer=minimizer_class(tolerance=tolerance), params=params,
+                        points=points, nuisance_params=nuisance_params, start_values=start_values,
+                        sess=zfit.run.sess)
+
+
+def parallel_profile_scan(create_loss: Callable, minimizer: ZfitMinimizer, params: List[ZfitParameter],
+                          points: np.ndarray, nuisance_params: List[ZfitParameter],
+                          start_values: Dict[ZfitParameter, float], n_workers: int) -> OrderedDict:
+    """Split `points` into `n_workers` consecutive strips and scan every strip in its own process.
+
+    Every worker is a new process (started with 'spawn') pinned to its share of the CPUs of `zfit.run`.
+    It builds the loss with `create_loss` and finds the parameters by their names.
+
+    Args:
+        create_loss (callable): Takes no arguments and returns the loss, which depends on parameters with the
+            same names as `params` and `nuisance_params`. Has to be picklable.
+        minimizer (ZfitMinimizer): A new instance of its class (with the same tolerance) is used in every
+            worker.
+        n_workers (int): Number of worker processes, at most one per CPU of `zfit.run` is used.
+
+        The other arguments are the same as in :py:func:`profile_scan`.
+
+    Returns:
+        OrderedDict: The columns of all strips, in the order of `points`.
+    """
+    start_values = {param.name: value for param, value in start_values.items()}
+    with zfit.run.aquire_cpu(max_cpu=-1) as cpu:
+        worker_cpu = split_cpu(cpu, n_blocks=n_workers)  # at most one worker per CPU
+        if not worker_cpu:
+            raise RuntimeError("No CPU of `zfit.run` is available for the worker processes.")
+        strips = np.array_split(np.asarray(points), len(worker_cpu))
+        worker_args = [(create_loss, type(minimizer), minimizer.tolerance, [param.name for param in params],
+                        strip, [param.name for param in nuisance_params], start_values, strip_cpu)
+                       for strip, strip_cpu in zip(strips, worker_cpu) if len(strip)]
+        with multiprocessing.get_context('spawn').Pool(processes=len(worker_args)) as pool:
+            worker_results = pool.starmap(_profile_scan_worker, worker_args)
+    return OrderedDict((name, np.concatenate([result[name] for result in worker_results]))
+                       for name in worker_results[0])
@@ -20,6 +20,7 @@ from ..core.parameter import Parameter
 from ..models.basefunctor import FunctorMixin
 from ..util import ztyping
 from ..util.container import convert_to_container
+from ..util.graph import get_dependents
 from ..util.exception import ExtendedPDFError, AlreadyExtendedPDFError, AxesNotUnambiguousError, LimitsOverdefinedError
 from ..util.temporary import TemporarilySet
 from ..settings import ztypes
@@ -234,6 +235,14 @@ class SumPDF(BaseFunctor):
     def _n_dims(self):
         return self._space.n_obs  # TODO(mayou36): properly implement dimensions
 
+    def _get_dependents(self):
+        dependents = super()._get_dependents()
+        for frac in self.fracs:  # the fracs are Tensors, find the parameters they depend on
+            if isinstance(frac, tf.Tensor):
+                dependents = dependents.union(get_dependents(
+                    tensor=frac, candidates=frac.graph.get_collection("zfit_independent")))
+        return dependents
+
     def _apply_yield(self, value: float, norm_range: ztyping.LimitsType, log: bool):
         if all(self.pdfs_extended):
             return value
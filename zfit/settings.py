@@ -29,7 +29,9 @@ ztypes = DotDict({'float': tf.float64,
                  'auto_upcast': True,
                   })
 
-options = DotDict({'epsilon': 1e-8})
+options = DotDict({'epsilon': 1e-8,
+                  'data_cache_dir': None,  # directory to cache data read from ROOT files in
+                   })
 
 
 # sess = tf.InteractiveSession()
@@ -0,0 +1 @@
+from .core.toys import ToyStudy, run_toys
@@ -0,0 +1,112 @@
+"""In-graph caching of values that only change if the parameters they depend on change."""
+from typing import Callable, Iterable
+
+import tensorflow as tf
+from tensorflow.python.framework import ops
+from tensorflow.python.ops.resource_variable_ops import ResourceVariable
+
+import zfit
+from zfit import ztf
+from ..settings import ztypes
+from .graph import get_dependents
+
+_cache_switches = {}
+
+
+def get_cache_switch() -> tf.Tensor:
+    """Return the switch to enable (default) or disable the caches in the current graph.
+
+    The switch is a boolean placeholder with default `True`. Feeding `False` forces every cache in
+    the graph to recompute its value, e.g. `zfit.run(tensor, feed_dict={get_cache_switch(): False})`.
+    """
+    graph = tf.get_default_graph()
+    switch = _cache_switches.get(graph)
+    if switch is None:
+        with ops.init_scope():  # may be called inside a control flow construct
+            switch = tf.placeholder_with_default(True, shape=(), name="cache_switch")
+        _cache_switches[graph] = switch
+    return switch
+
+
+def _create_cache_variable(initial_value, dtype, name):
+    with ops.init_scope():  # may be called inside a control flow construct
+        variable = ResourceVariable(initial_value=initial_value, dtype=dtype, trainable=False, name=name)
+    zfit.run.auto_initialize(variable)
+    return variable
+
+
+def _stack_params(params):
+    if not params:
+        return tf.zeros(shape=(0,), dtype=ztypes.float)
+    return tf.stack([ztf.to_real(param) for param in params])
+
+
+def cache_value_by_params(func: Callable, params: Iterable["zfit.Parameter"],
+                          name: str = "cache_value_by_params") -> tf.Tensor:
+    """Return the value of `func`, recomputed only if the values of `params` changed since the last run.
+
+    The value and its gradient with respect to `params` are stored in non-trainable variables together
+    with the values of `params` they were computed with. As long as the values of `params` stay the same,
+    the stored value and gradient are returned without evaluating `func`. Therefore `func` must not depend
+    on anything else that changes between runs. Second derivatives are not cached; to compute them,
+    disable the caches with the switch from :py:func:`get_cache_switch`.
+
+    Args:
+        func (callable): Takes no arguments and returns a Tensor holding exactly one value.
+        params (iterable(`zfit.Parameter`)): The parameters that `func` depends on. If the graph of `func`
+            depends on further parameters (e.g. through Tensors that are not registered as parameters of a
+            model), the value is built again with all of them, so the cache can't become stale.
+        name (str):
+
+    Returns:
+        tf.Tensor: The (possibly cached) value of `func` with the same shape as the value returned by `func`.
+    """
+    params = sorted(params, key=lambda param: param.name)
+    with tf.name_scope(name):
+        cache_valid = _create_cache_variable(False, dtype=tf.bool, name="cache_valid")
+        cached_params = _create_cache_variable([0.] * len(params), dtype=ztypes.float, name="cached_params")
+        cached_value = _create_cache_variable(0., dtype=ztypes.float, name="cached_value")
+        cached_gradients = _create_cache_variable([0.] * len(params), dtype=ztypes.float,
+                                                  name="cached_gradients")
+        value_shape = []
+
+        @tf.custom_gradient
+        def cached_func(param_values):
+            def recompute():
+                value = ztf.convert_to_tensor(func())
+                value_shape.append(value.shape)
+                value = tf.reshape(value, shape=())
+                gradients = tf.gradients(value, params) if params else []
+                gradients = _stack_params([ztf.constant(0.) if grad is None else grad for grad in gradients])
+                update_cache = [cached_params.assign(param_values, read_value=False),
+                                cached_value.assign(value, read_value=False),
+                                cached_gradients.assign(gradients, read_value=False),
+                                cache_valid.assign(True, read_value=False)]
+                with tf.control_dependencies(update_cache):
+                    return tf.identity(value), tf.identity(gradients)
+
+            def use_cache():
+                return cached_value.read_value(), cached_gradients.read_value()
+
+            is_cached = tf.logical_and(cache_valid.read_value(),
+                                       tf.reduce_all(tf.equal(param_values, cached_params.read_value())))
+            is_cached = tf.logical_and(is_cached, get_cache_switch())
+            value, gradients = tf.cond(is_cached, use_cache, recompute)
+
+            def grad_fn(dy, variables=None):
+                params_gradients = dy * gradients
+                if variables is None:
+                    return params_gradients
+                return params_gradients, [None] * len(variables)  # already propagated through `param_values`
+
+            return value, grad_fn
+
+        value = cached_func(_stack_params(params))
+        graph_params = get_dependents(tensor=value, candidates=value.graph.get_collection("zfit_independent"))
+        missing_params = [param for param in graph_params if id(param) not in set(id(p) for p in params)]
+        if missing_params:  # the built value is never run
+            return cache_value_by_params(func=func, params=params + missing_params, name=name)
+        shape = value_shape[0]
+        if shape.ndims is not None:  # unknown dimensions have to be 1 as there is exactly one value
+            value = tf.reshape(value, shape=[1 if dim is None else dim for dim in shape.as_list()])
+        return value
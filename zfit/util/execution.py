@@ -3,7 +3,7 @@ import copy
 import multiprocessing
 import os
 import sys
-from typing import List
+from typing import Iterable, List, Union
 import warnings
 
 import tensorflow as tf
@@ -22,12 +22,16 @@ class RunManager:
         self._sess_kwargs = {}
         self.chunking = DotDict()
         self._cpu = []
+        self._cpu_budget = []
+        self._sess_cpu = []  # the cpus with an inter-op thread pool in the current session
 
         self.set_n_cpu(n_cpu=n_cpu)
 
         # set default values
-        self.chunking.active = False  # not yet implemented the chunking...
+        self.chunking.active = False  # if True, the NLL is evaluated in chunks of `max_n_points` events
         self.chunking.max_n_points = 100000
+        self.parallel = DotDict()
+        self.parallel.components = False  # if True, the components of a simultaneous loss run concurrently
 
     def auto_initialize(self, variable: tf.Variable):
         self(variable.initializer)
@@ -43,21 +47,81 @@ class RunManager:
     def n_cpu(self):
         return len(self._cpu)
 
-    def set_n_cpu(self, n_cpu='auto'):
+    def set_n_cpu(self, n_cpu: Union[str, int, Iterable[int]] = 'auto', pin: bool = False):
+        """Set the CPUs that zfit uses. Takes effect for sessions created afterwards.
+
+        Args:
+            n_cpu (str, int, list(int)): 'auto' to use all CPUs available to the process, the number of
+                CPUs to use (the first available ones, at most all of them) or the ids of the CPUs to use
+                (only the available ones, all available ones if none of them is).
+            pin (bool): If True, restrict the process to the CPUs (Linux only). Threads started later,
+                like the thread pools of a new session, only run on these CPUs.
+        """
+        try:
+            available_cpu = sorted(os.sched_getaffinity(0))
+        except AttributeError:
+            available_cpu = list(range(multiprocessing.cpu_count()))
+            warnings.warn("Not running on Linux. Determining available cpus for thread can fail"
+                          "and be overestimated. Workaround (only if too many cpus are used):"
+                          "`zfit.run.set_n_cpu(your_cpu_number)`")
         if n_cpu == 'auto':
+            cpu = available_cpu
+        elif isinstance(n_cpu, int):
+            if n_cpu > len(available_cpu):
+                warnings.warn("{} CPUs requested but only {} are available to the process, using these."
+                              "".format(n_cpu, len(available_cpu)))
+            cpu = available_cpu[:n_cpu]
+        else:
+            cpu = [single_cpu for single_cpu in n_cpu if single_cpu in available_cpu]
+            unavailable_cpu = [single_cpu for single_cpu in n_cpu if single_cpu not in available_cpu]
+            if unavailable_cpu:
+                if not cpu:
+                    cpu = available_cpu
+                warnings.warn("The CPUs {} are not available to the process, using {}."
+                              "".format(unavailable_cpu, cpu))
+        if pin:
             try:
-                cpu = sorted(os.sched_getaffinity(0))
+                os.sched_setaffinity(0, cpu)
             except AttributeError:
-                cpu = range(multiprocessing.cpu_count())
-                warnings.warn("Not running on Linux. Determining available cpus for thread can fail"
-                              "and be overestimated. Workaround (only if too many cpus are used):"
-                              "`zfit.run.set_n_cpu(your_cpu_number)`")
-        elif isinstance(n_cpu, int):
-            cpu = range(n_cpu)
-        self._cpu = ['dummy_cpu{}'.format(i) for i in cpu]
+                warnings.warn("Pinning the process to cpus is only supported on Linux, ignored.")
+        self._cpu = list(cpu)
+        self._cpu_budget = list(cpu)
+
+    @property
+    def config(self) -> tf.ConfigProto:
+        """The session config derived from the CPUs set with `set_n_cpu`.
+
+        The intra-op and the first (default) inter-op thread pool have one thread per CPU. In addition, every
+        CPU has its own inter-op thread pool with one thread, see :py:meth:`get_run_options`.
+        """
+        n_threads = max(len(self._cpu_budget), 1)
+        config = tf.ConfigProto(intra_op_parallelism_threads=n_threads,
+                                inter_op_parallelism_threads=n_threads)
+        config.session_inter_op_thread_pool.add(num_threads=n_threads)
+        for _ in self._cpu_budget:
+            config.session_inter_op_thread_pool.add(num_threads=1)
+        return config
+
+    def get_run_options(self, cpu: List[int]) -> tf.RunOptions:
+        """Return the options to run in the inter-op thread pool of `cpu`, acquired with `aquire_cpu`.
+
+        Runs with different acquired CPUs use disjoint inter-op thread pools and do not compete for threads.
+        If `cpu` is empty, the default pool is used.
+
+        Args:
+            cpu (list(int)): CPUs as returned by `aquire_cpu`.
+
+        Returns:
+            tf.RunOptions: To be given as `options` to `zfit.run`.
+        """
+        if cpu and cpu[0] in self._sess_cpu:
+            pool = self._sess_cpu.index(cpu[0]) + 1
+        else:  # the session was created before the cpu was set or with another config
+            pool = 0
+        return tf.RunOptions(inter_op_thread_pool=pool)
 
     @contextlib.contextmanager
-    def aquire_cpu(self, max_cpu: int = -1) -> List[str]:
+    def aquire_cpu(self, max_cpu: int = -1) -> List[int]:
         if isinstance(max_cpu, int):
             if max_cpu < 0:
                 max_cpu = max((self.n_cpu + 1 + max_cpu, 0))  # -1 means all
@@ -78,6 +142,8 @@ class RunManager:
     def create_session(self, *args, **kwargs):
         """Create a new session (or replace the current one). Arguments will overwrite the already set arguments.
 
+        If no `config` is given, the session is configured with :py:attr:`config`.
+
         Args:
             *args ():
             **kwargs ():
@@ -87,6 +153,11 @@ class RunManager:
         """
         sess_kwargs = copy.deepcopy(self._sess_kwargs)
         sess_kwargs.update(kwargs)
+        if sess_kwargs.get('config') is None:
+            sess_kwargs['config'] = self.config
+            self._sess_cpu = list(self._cpu_budget)
+        else:
+            self._sess_cpu = []
         self.sess = tf.Session(*args, **sess_kwargs)
         return self.sess
 
@@ -101,6 +172,25 @@ class RunManager:
         self._sess = value
 
 
+def split_cpu(cpu: List[int], n_blocks: int) -> List[List[int]]:
+    """Split `cpu` into `n_blocks` disjoint blocks of (almost) the same size, e.g. to pin worker processes.
+
+    Every block gets at least one CPU of its own: if there are fewer CPUs than `n_blocks`, there are only as
+    many blocks as CPUs (none if `cpu` is empty), so the workers using them do not compete for the CPUs.
+    """
+    n_blocks = min(n_blocks, len(cpu))
+    if n_blocks < 1:
+        return []
+    block_size, n_larger_blocks = divmod(len(cpu), n_blocks)
+    blocks = []
+    start = 0
+    for i in range(n_blocks):
+        stop = start + block_size + (i < n_larger_blocks)
+        blocks.append([int(single_cpu) for single_cpu in cpu[start:stop]])
+        start = stop
+    return blocks
+
+
 class SessionHolderMixin:
 
     def __init__(self, *args, **kwargs):
@@ -1,30 +1,217 @@
-from typing import List
+from collections import OrderedDict
+from typing import FrozenSet, List
 
 import tensorflow as tf
 
 
-# TODO(Mayou36): make not recursive
-def all_parents(op, current_obs=None):
-    if current_obs is None:
-        current_obs = set()
-    ops = set(input_.op for input_ in op.inputs if input_.op not in current_obs)
-    current_obs = current_obs.union(ops)
-    return ops.union(*(all_parents(op, current_obs=current_obs) for op in ops))
+class GraphBuildProfiler:
+    """Count how often and for how long the models build their graph, grouped by model name.
+
+    While active (e.g. used as a context manager `with graph_build_profiler:`), every call of `pdf` is
+    recorded: the number of graphs built ('n_builds'), the number of calls that reused an already built
+    graph ('n_cached') and the time spent building ('time', in seconds, including the daughter models).
+    """
+
+    def __init__(self):
+        self.active = False
+        self.stats = OrderedDict()
+
+    def reset(self):
+        self.stats = OrderedDict()
+
+    def record(self, name: str, duration: float = 0., cached: bool = False):
+        if not self.active:
+            return
+        stats = self.stats.setdefault(name, {'n_builds': 0, 'n_cached': 0, 'time': 0.})
+        if cached:
+            stats['n_cached'] += 1
+        else:
+            stats['n_builds'] += 1
+            stats['time'] += duration
+
+    def __enter__(self):
+        self.reset()
+        self.active = True
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.active = False
+
+
+graph_build_profiler = GraphBuildProfiler()
+
+
+def in_control_flow_or_dependencies(graph: tf.Graph = None) -> bool:
+    """Return True if ops are currently created inside a control flow construct or control dependencies.
+
+    Tensors created in such a context can't be reused outside of it and vice versa. This relies on
+    private attributes of the graph: if they are not available, True is returned, so nothing is reused.
+    """
+    if graph is None:
+        graph = tf.get_default_graph()
+    get_control_flow_context = getattr(graph, '_get_control_flow_context', None)
+    control_dependencies_stack = getattr(graph, '_control_dependencies_stack', None)
+    if get_control_flow_context is None or control_dependencies_stack is None:
+        return True
+    return get_control_flow_context() is not None or bool(control_dependencies_stack)
+
+
+_VARIABLE_OP_TYPES = frozenset(['VarHandleOp', 'VariableV2', 'Variable'])
+
+
+def _input_ops(op: tf.Operation) -> List[tf.Operation]:
+    return [input_.op for input_ in op.inputs]
+
+
+def all_parents(op: tf.Operation) -> FrozenSet[tf.Operation]:
+    """Return all ops that `op` depends on through its inputs (`op` itself only if it is inside a loop).
+
+    The graph is walked iteratively, so deep graphs do not hit the recursion limit. Every op is visited
+    once, so a query is linear in the size of the ancestry of `op`. To find the variables `op` depends on,
+    use the memoized :py:func:`variable_ancestors`.
+    """
+    parents = set()
+    stack = [op]
+    while stack:
+        for parent in _input_ops(stack.pop()):
+            if parent not in parents:
+                parents.add(parent)
+                stack.append(parent)
+    return frozenset(parents)
+
+
+def variable_ancestors(op: tf.Operation) -> FrozenSet[tf.Operation]:
+    """Return the ops of the variables that `op` depends on through its inputs (`op` itself if it is one).
+
+    The result is memoized per graph for `op` and for every op visited to find it, so every op of a graph is
+    walked only once over all queries and a query stops at the ops already known. Only the variables are
+    stored (and shared between ops with the same ones), so the memory is linear in the size of the graph for
+    a limited number of variables. The ops of a loop depend on each other: they are grouped into strongly
+    connected components (with Tarjan's algorithm) that share the variables of all their members.
+    """
+    graph = op.graph
+    cache = getattr(graph, '_zfit_variable_ancestors', None)
+    if cache is None:
+        cache = {}
+        graph._zfit_variable_ancestors = cache  # lives as long as the graph
+    if op in cache:
+        return cache[op]
+
+    index = {op: 0}
+    lowlink = {op: 0}
+    component_stack = [op]
+    on_component_stack = {op}
+    work = [(op, iter(_input_ops(op)))]
+    while work:
+        current, inputs = work[-1]
+        for input_op in inputs:
+            if input_op in cache:
+                continue
+            if input_op not in index:
+                index[input_op] = lowlink[input_op] = len(index)
+                component_stack.append(input_op)
+                on_component_stack.add(input_op)
+                work.append((input_op, iter(_input_ops(input_op))))
+                break
+            if input_op in on_component_stack:
+                lowlink[current] = min(lowlink[current], index[input_op])
+        else:  # all inputs are done
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[current])
+            if lowlink[current] == index[current]:  # `current` is the root of a strongly connected component
+                members = []
+                while True:
+                    member = component_stack.pop()
+                    on_component_stack.discard(member)
+                    members.append(member)
+                    if member is current:
+                        break
+                variables = set(member for member in members if member.type in _VARIABLE_OP_TYPES)
+                input_variables = [cache[input_op] for member in members for input_op in _input_ops(member)
+                                   if input_op in cache]
+                for other_variables in input_variables:
+                    variables.update(other_variables)
+                # share the set of an input with the same variables
+                result = next((other_variables for other_variables in input_variables
+                               if len(other_variables) == len(variables)), None)
+                if result is None:
+                    result = frozenset(variables)
+                for member in members:
+                    cache[member] = result
+    return cache[op]
 
 
 def get_dependents(tensor: tf.Tensor, candidates: List[tf.Tensor]) -> List[tf.Tensor]:
     """Return the nodes in `candidates` that `tensor` depends on.
 
+    If all `candidates` are variables (e.g. parameters), the memoized :py:func:`variable_ancestors` are used,
+    otherwise the graph is walked with :py:func:`all_parents`.
+
     Args:
         tensor ():
         candidates ():
     """
-
-    dependent_ops = all_parents(tensor.op)
+    if all(cand.op.type in _VARIABLE_OP_TYPES for cand in candidates):
+        dependent_ops = variable_ancestors(tensor.op)
+    else:
+        dependent_ops = all_parents(tensor.op)
     dependent_candidates = [cand for cand in candidates if cand.op in dependent_ops]
     return dependent_candidates
 
 
+_FORWARDING_OP_TYPES = frozenset(['Enter', 'RefEnter', 'Switch', 'RefSwitch', 'Identity', 'RefIdentity'])
+
+
+def _dependencies(op: tf.Operation) -> List[tf.Operation]:
+    return [input_.op for input_ in op.inputs] + list(op.control_inputs)
+
+
+def _resource_source(tensor: tf.Tensor) -> tf.Operation:
+    """Return the op creating the resource `tensor`, skipping the ops forwarding it into control flow."""
+    while tensor.op.type in _FORWARDING_OP_TYPES:
+        tensor = tensor.op.inputs[0]
+    return tensor.op
+
+
+def variables_read_after(tensors: List[tf.Tensor], op: tf.Operation, variables: List[tf.Variable]) -> bool:
+    """Return True if every use of the resource `variables` in the graph of `tensors` is executed after `op`.
+
+    Data as well as control dependencies are followed. The ops that `op` depends on itself (e.g. assignments
+    of the `variables` that `op` waits for) are not checked. Dependencies through loops are not followed, so
+    False may be returned for a use that actually runs after `op`, but never True for one that doesn't.
+    """
+    handle_ops = {variable.handle.op for variable in variables}
+    before_op = set()
+    stack = [op]
+    while stack:
+        for dependency in _dependencies(stack.pop()):
+            if dependency not in before_op:
+                before_op.add(dependency)
+                stack.append(dependency)
+
+    after_op = {op: True}  # whether an op is executed after `op`
+    stack = [(tensor.op, False) for tensor in tensors]
+    while stack:
+        current, dependencies_done = stack.pop()
+        if dependencies_done:
+            after_op[current] = any(after_op.get(dependency, False) for dependency in _dependencies(current))
+        elif current not in after_op:
+            after_op[current] = False  # until its dependencies are done, a loop back to it is not followed
+            stack.append((current, True))
+            stack.extend((dependency, False) for dependency in _dependencies(current)
+                         if dependency not in after_op)
+
+    for current, is_after in after_op.items():
+        if is_after or current in before_op or current.type in _FORWARDING_OP_TYPES:
+            continue
+        if any(_resource_source(input_) in handle_ops for input_ in current.inputs
+               if input_.dtype == tf.resource):
+            return False
+    return True
+
+
 if __name__ == '__main__':
     a = tf.distributions.Normal(1., 3.).sample() * 5.
     var1 = tf.get_variable('a1', 1.)
@@ -30,6 +30,7 @@ XType = Union[float, tf.Tensor]
 XTypeInput = Union[np.ndarray, tf.Tensor, "Data"]
 XTypeReturn = Union[tf.Tensor, "Data"]
 NumericalTypeReturn = Union[tf.Tensor, np.array]
+WeightsInputType = Optional[Union[np.ndarray, tf.Tensor]]
 
 NumericalScalarType = Union[int, float, complex, tf.Tensor]
 
@@ -26,5 +26,6 @@
 
 # same as in TensorFlow, wrapped
 
-from .zextension import to_complex, to_real, constant, inf, pi, abs_square, nth_pow, unstack_x
+from .zextension import (to_complex, to_real, constant, inf, pi, abs_square, nth_pow, unstack_x, chunked_sum,
+                         chunked_reduce_sum, )
 from .wrapping_tf import log, exp, random_normal, random_uniform, convert_to_tensor, reduce_sum, reduce_prod, square
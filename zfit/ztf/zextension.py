@@ -1,6 +1,6 @@
 import math as _mt
 
-from typing import Any
+from typing import Any, Callable
 
 try:
     from math import inf as _inf
@@ -53,6 +53,120 @@ def unstack_x(value: Any, num: Any = None, axis: int = 0, name: str = "unstack_x
     return tf.unstack(value=value, num=num, axis=axis, name=name)
 
 
+def chunked_sum(func: Callable, n_chunks: Any, initial_value: Any = 0., name: str = "chunked_sum"):
+    """Sum `func(chunk_num)` over `chunk_num` in `range(n_chunks)` sequentially to bound the memory.
+
+    Only one chunk is evaluated at a time, for the value as well as for the gradient. The gradients
+    with respect to the (resource) variables used inside `func` are accumulated chunk-wise in a
+    second loop. They can be differentiated once more (e.g. for the Hessian), see
+    :py:func:`_chunked_gradients`.
+
+    Args:
+        func (callable): Takes the number of the chunk (an int32 scalar Tensor) and returns a Tensor
+            with the same shape and dtype as `initial_value`.
+        n_chunks (int or tf.Tensor): The number of chunks.
+        initial_value (numerical): The value to add the chunks to. Determines shape and dtype.
+        name (str):
+
+    Returns:
+        tf.Tensor: The sum of `func` over all chunks.
+    """
+    initial_value = tf.convert_to_tensor(initial_value, preferred_dtype=ztypes.float)
+
+    @tf.custom_gradient
+    def sequential_sum(n_chunks):
+        def cond(chunk_num, _):
+            return chunk_num < n_chunks
+
+        def value_body(chunk_num, total):
+            return chunk_num + 1, total + func(chunk_num)
+
+        _, value = tf.while_loop(cond=cond, body=value_body,
+                                 loop_vars=(tf.constant(0), initial_value),
+                                 parallel_iterations=1, back_prop=False, name=name)
+
+        def grad_fn(dy, variables=None):
+            if not variables:
+                return None, []
+            return None, _chunked_gradients(func=func, cond=cond, variables=variables, dy=dy, name=name)
+
+        return value, grad_fn
+
+    return sequential_sum(tf.convert_to_tensor(n_chunks, dtype=tf.int32))
+
+
+def _chunked_gradients(func: Callable, cond: Callable, variables: list, dy: tf.Tensor, name: str):
+    """Accumulate the gradients of `func(chunk_num)` with respect to `variables` chunk by chunk.
+
+    The gradient of the returned gradients, a Hessian-vector product, is accumulated chunk by chunk in
+    another loop, so the Hessian is available as well. Higher derivatives are not.
+    """
+
+    def chunk_gradients(chunk_num, dy):
+        gradients = tf.gradients(func(chunk_num), variables, grad_ys=dy)
+        return [tf.zeros_like(var) if grad is None else grad for var, grad in zip(variables, gradients)]
+
+    @tf.custom_gradient
+    def sequential_gradients(dy):
+        def gradient_body(chunk_num, total_gradients):
+            total_gradients = [total + grad for total, grad in zip(total_gradients,
+                                                                    chunk_gradients(chunk_num, dy=dy))]
+            return chunk_num + 1, total_gradients
+
+        initial_gradients = [tf.zeros_like(var) for var in variables]
+        _, gradients = tf.while_loop(cond=cond, body=gradient_body,
+                                     loop_vars=(tf.constant(0), initial_gradients),
+                                     parallel_iterations=1, back_prop=False, name=name + "_gradient")
+
+        def hessian_vector_fn(*vector, variables=None):
+            if not variables:
+                return None, []
+            vector = [tf.zeros_like(grad) if vec is None else vec for vec, grad in zip(vector, gradients)]
+
+            def hessian_vector_body(chunk_num, total_products):
+                directional_gradient = tf.add_n([tf.reduce_sum(grad * vec) for grad, vec
+                                                 in zip(chunk_gradients(chunk_num, dy=dy), vector)])
+                products = tf.gradients(directional_gradient, variables)
+                total_products = [total if product is None else total + product
+                                  for total, product in zip(total_products, products)]
+                return chunk_num + 1, total_products
+
+            initial_products = [tf.zeros_like(var) for var in variables]
+            _, products = tf.while_loop(cond=cond, body=hessian_vector_body,
+                                        loop_vars=(tf.constant(0), initial_products),
+                                        parallel_iterations=1, back_prop=False, name=name + "_hessian")
+            return None, products
+
+        return gradients, hessian_vector_fn
+
+    return sequential_gradients(dy)
+
+
+def chunked_reduce_sum(func: Callable, x: tf.Tensor, chunksize: int, name: str = "chunked_reduce_sum"):
+    """Sum `func` evaluated on chunks of `x` (along the last axis) sequentially to bound the memory.
+
+    See :py:func:`chunked_sum`, the gradient with respect to `x` is not available.
+
+    Args:
+        func (callable): Takes a chunk of `x` with shape (n_obs, chunksize) and returns a scalar.
+        x (tf.Tensor): The values with shape (n_obs, n_events) to be split into chunks.
+        chunksize (int): The maximum number of events in a chunk.
+        name (str):
+
+    Returns:
+        tf.Tensor: The sum of `func` over all chunks.
+    """
+    chunksize = int(chunksize)
+    n_chunks = (tf.shape(x)[1] + chunksize - 1) // chunksize
+
+    def chunk_value(chunk_num):
+        start = chunk_num * chunksize
+        return func(x[:, start:start + chunksize])
+
+    return chunked_sum(func=chunk_value, n_chunks=n_chunks, initial_value=tf.constant(0., dtype=x.dtype),
+                       name=name)
+
+
 # random sampling
 
 